@@ -0,0 +1,752 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import naruto as nr
+import servidor as sv
+
+
+# mediciones de rendimiento, se corren desde la terminal:
+#   python benchmark.py xml --ninjas 1000000
+
+def generar_mundo(n_ninjas: int, n_misiones: int = 0):
+    fabricas = [nr.HojaFactory(), nr.ArenaFactory(), nr.NieblaFactory(), nr.RocaFactory(),
+                nr.NubeFactory(), nr.SonidoFactory(), nr.LluviaFactory()]
+    aldeas = [nr.Aldea(nombre) for nombre in ("Hoja", "Arena", "Niebla", "Roca", "Nube", "Sonido", "Lluvia")]
+    ninjas = []
+    for k, fabrica in enumerate(fabricas):
+        lote = fabrica.crear_ninjas([f"ninja-{i}" for i in range(k, n_ninjas, len(fabricas))])
+        aldeas[k].add_ninjas(lote)
+        ninjas.extend(lote)
+    rangos_mision = list(nr.RangoMision)
+    rangos_ninja = list(nr.RangoNinja)
+    misiones = [nr.Mision(rangos_mision[i % 5], 100 + i % 1000, rangos_ninja[i % 5]) for i in range(n_misiones)]
+    return aldeas, ninjas, misiones
+
+
+def medir(funcion, *args, memoria: bool = True):
+    inicio = time.perf_counter()
+    funcion(*args)
+    segundos = time.perf_counter() - inicio
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        funcion(*args)
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return segundos, pico
+
+
+def imprimir(nombre: str, registros: int, segundos: float, pico: int | None):
+    pico_txt = f"{pico / 2**20:10.1f} MB" if pico is not None else "         -"
+    print(f"{nombre:<28} {segundos:9.3f} s {registros / segundos:14,.0f} reg/s {pico_txt}")
+
+
+# xml: ruta vieja (concatenar todo el documento) contra el writer por bloques
+
+def _xml_concatenado(ninjas, misiones, ruta):
+    visitor = nr.XmlExportVisitor()
+    ninjas_xml = "".join([n.accept(visitor) for n in ninjas])
+    misiones_xml = "".join([m.accept(visitor) for m in misiones])
+    texto = f"<dataset><ninjas>{ninjas_xml}</ninjas><misiones>{misiones_xml}</misiones></dataset>"
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(texto)
+
+
+def _xml_stream(ninjas, misiones, ruta):
+    nr.exportar_xml(ninjas, misiones, filename=ruta)
+
+
+def bench_xml(args):
+    _, ninjas, misiones = generar_mundo(args.ninjas, args.misiones)
+    registros = len(ninjas) + len(misiones)
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "bench.xml")
+        for nombre, funcion in (("xml concatenado", _xml_concatenado), ("xml stream", _xml_stream)):
+            segundos, pico = medir(funcion, ninjas, misiones, ruta, memoria=not args.sin_memoria)
+            imprimir(nombre, registros, segundos, pico)
+
+
+# memoria por ninja: modelo con __dict__ y un Jutsu nuevo por ninja (como era antes)
+# contra el modelo con __slots__ y jutsus compartidos de las fabricas
+
+class _EstadisticasDict:
+    def __init__(self, ataque, defensa, chakra):
+        self.ataque = ataque
+        self.defensa = defensa
+        self.chakra = chakra
+
+
+class _JutsuDict:
+    def __init__(self, nombre, costo_chakra, efecto):
+        self.nombre = nombre
+        self.costo_chakra = costo_chakra
+        self.efecto = efecto
+
+
+class _NinjaDict:
+    def __init__(self, nombre, rango, estadisticas):
+        self.nombre = nombre
+        self.rango = rango
+        self.estadisticas = estadisticas
+        self.jutsus = []
+        self.aldea = None
+
+
+def _crear_con_dict(nombre):
+    ninja = _NinjaDict(nombre, nr.RangoNinja.GENIN, _EstadisticasDict(50, 40, 100))
+    ninja.jutsus.append(_JutsuDict("Katon: Goukakyuu no Jutsu", 20, "Bola de fuego"))
+    return ninja
+
+
+def _bytes_por_ninja(crear, nombres):
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    ninjas = [crear(nombre) for nombre in nombres]
+    despues = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del ninjas
+    return (despues - antes) / len(nombres)
+
+
+def bench_memoria(args):
+    # los nombres se crean antes para que no cuenten en ninguno de los dos
+    nombres = [f"ninja-{i}" for i in range(args.ninjas)]
+    fabrica = nr.HojaFactory()
+    antes = _bytes_por_ninja(_crear_con_dict, nombres)
+    despues = _bytes_por_ninja(fabrica.crear_ninja, nombres)
+    print(f"{args.ninjas:,} ninjas de HojaFactory")
+    print(f"  {'__dict__ y Jutsu por ninja':<34} {antes:8.1f} bytes/ninja")
+    print(f"  {'__slots__ y Jutsu compartido':<34} {despues:8.1f} bytes/ninja ({1 - despues / antes:.0%} menos)")
+
+
+# torneos: peleas por segundo segun la cantidad de workers
+
+def generar_participantes(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    fabricas = [nr.HojaFactory(), nr.ArenaFactory(), nr.NieblaFactory(), nr.RocaFactory(),
+                nr.NubeFactory(), nr.SonidoFactory(), nr.LluviaFactory()]
+    participantes = []
+    for i in range(n):
+        ninja = fabricas[i % len(fabricas)].crear_ninja(f"ninja-{i}")
+        ninja.estadisticas.entrenar(inc_ataque=rng.randint(0, 40), inc_defensa=rng.randint(0, 40),
+                                    inc_chakra=rng.randint(0, 40))
+        participantes.append(ninja)
+    return participantes
+
+
+def bench_torneo(args):
+    participantes = generar_participantes(args.participantes)
+    workers = args.workers or sorted({1, 2, 4, os.cpu_count() or 1})
+    referencia = None
+    print(f"{args.formato} con {args.participantes:,} participantes")
+    for w in workers:
+        torneo = nr.Torneo(participantes, workers=w)
+        inicio = time.perf_counter()
+        if args.formato == "eliminacion":
+            tabla = torneo.eliminacion_directa()
+        elif args.formato == "suizo":
+            tabla = torneo.suizo(args.rondas)
+        else:
+            tabla = torneo.todos_contra_todos()
+        segundos = time.perf_counter() - inicio
+        orden = [p.ninja.nombre for p in tabla]
+        referencia = referencia or orden
+        igual = "igual" if orden == referencia else "DISTINTA"
+        print(f"  workers={w:<3} {segundos:8.3f} s {torneo.peleas / segundos:16,.0f} peleas/s  clasificacion {igual}")
+
+
+# export incremental: re-exportar despues de entrenar a unos pocos ninjas
+
+def bench_incremental(args):
+    _, ninjas, misiones = generar_mundo(args.ninjas, args.misiones)
+    inc = nr.ExportIncremental(args.formato)
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "bench")
+        delta = os.path.join(tmp, "delta.ndjson")
+        inicio = time.perf_counter()
+        inc.exportar(ninjas, misiones, ruta)
+        print(f"{'exportacion inicial':<28} {time.perf_counter() - inicio:9.3f} s")
+        rng = random.Random(7)
+        for ninja in rng.sample(ninjas, min(args.entrenados, len(ninjas))):
+            ninja.entrenar()
+        inicio = time.perf_counter()
+        inc.exportar(ninjas, misiones, delta=delta)
+        print(f"{'solo delta':<28} {(time.perf_counter() - inicio) * 1000:9.1f} ms ({inc.renderizados} renderizados)")
+        for ninja in rng.sample(ninjas, min(args.entrenados, len(ninjas))):
+            ninja.entrenar()
+        inicio = time.perf_counter()
+        inc.exportar(ninjas, misiones, ruta, delta=delta)
+        segundos = time.perf_counter() - inicio
+        print(f"{'archivo completo y delta':<28} {segundos:9.3f} s ({inc.renderizados} renderizados)")
+    inc.cerrar()
+
+
+# servidor: muchos clientes concurrentes contra el actor, latencia p50/p99 por pedido
+
+def _pedidos_cliente(c: int, n: int, ninjas_base: int, rng: random.Random):
+    origenes = list(nr.FABRICAS)
+    for k in range(n):
+        r = rng.random()
+        if r < 0.4:
+            yield {"op": "entrenar", "nombre": f"ninja-{rng.randrange(ninjas_base)}", "ataque": 1, "chakra": 2}
+        elif r < 0.8:
+            a, b = rng.sample(range(ninjas_base), 2)
+            yield {"op": "pelear", "ninja1": f"ninja-{a}", "ninja2": f"ninja-{b}"}
+        elif r < 0.95:
+            yield {"op": "crear_ninja", "nombre": f"cliente-{c}-{k}", "aldea": "hoja",
+                   "origen": rng.choice(origenes)}
+        else:
+            yield {"op": "crear_mision", "rango": "c", "recompensa": 500, "rango_requerido": "chunin"}
+
+
+async def _cliente(puerto: int, c: int, args, latencias: list[float], errores: list[str]):
+    reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+    rng = random.Random(c)
+    for pedido in _pedidos_cliente(c, args.pedidos, args.ninjas, rng):
+        inicio = time.perf_counter()
+        writer.write(json.dumps(pedido).encode("utf-8") + b"\n")
+        respuesta = json.loads(await reader.readline())
+        latencias.append(time.perf_counter() - inicio)
+        if not respuesta["ok"]:
+            errores.append(respuesta["error"])
+    writer.close()
+    await writer.wait_closed()
+
+
+async def _carga(args):
+    aldeas, ninjas, misiones = generar_mundo(args.ninjas)
+    mundo = nr.Mundo(aldeas, ninjas, misiones)
+    servidor = sv.Servidor(sv.ActorMundo(mundo), puerto=0)
+    await servidor.iniciar()
+    latencias: list[float] = []
+    errores: list[str] = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*[_cliente(servidor.puerto, c, args, latencias, errores) for c in range(args.clientes)])
+    segundos = time.perf_counter() - inicio
+    await servidor.detener()
+
+    latencias.sort()
+    p50 = latencias[len(latencias) // 2]
+    p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+    print(f"{args.clientes:,} clientes x {args.pedidos} pedidos sobre {args.ninjas:,} ninjas")
+    print(f"  {len(latencias):,} pedidos en {segundos:.2f} s ({len(latencias) / segundos:,.0f} pedidos/s), "
+          f"{len(errores)} errores")
+    print(f"  p50 {p50 * 1000:8.2f} ms   p99 {p99 * 1000:8.2f} ms   max {latencias[-1] * 1000:8.2f} ms")
+
+
+def bench_servidor(args):
+    asyncio.run(_carga(args))
+
+
+# creacion: uno por uno con la fabrica contra las rutas por lote
+
+def bench_creacion(args):
+    nombres = nr.GeneradorNombres(args.seed).nombres(args.ninjas)
+    fabrica = nr.HojaFactory()
+    builder = nr.NinjaBuilder().with_nombre("clon").with_rango(nr.RangoNinja.CHUNIN)
+    casos = (
+        ("crear_ninja uno por uno", lambda: [fabrica.crear_ninja(n) for n in nombres]),
+        ("crear_ninjas", lambda: fabrica.crear_ninjas(nombres)),
+        ("build_lote", lambda: builder.build_lote(nombres)),
+        ("crear_roster", lambda: fabrica.crear_roster(nombres)),
+        ("poblar_aldea (7 fabricas)", lambda: nr.poblar_aldea(nr.Aldea("Hoja"),
+                                                               {o: args.ninjas // 7 for o in nr.FABRICAS}, nombres)),
+    )
+    print(f"{args.ninjas:,} ninjas")
+    for nombre, funcion in casos:
+        segundos, pico = medir(funcion, memoria=not args.sin_memoria)
+        imprimir(nombre, args.ninjas, segundos, pico)
+
+
+# suite: todos los caminos calientes a varias escalas, con resultados en json
+# y comparacion contra una linea base para detectar regresiones:
+#   python benchmark.py suite --escalas 1k 100k 1M --salida hoy.json --baseline base.json
+
+def _cantidad(texto: str) -> int:
+    sufijos = {"k": 1_000, "m": 1_000_000}
+    texto = texto.strip().lower().replace("_", "")
+    if texto[-1:] in sufijos:
+        return int(float(texto[:-1]) * sufijos[texto[-1]])
+    return int(texto)
+
+
+def _reiniciar_pico_rss():
+    # en linux escribir 5 en clear_refs reinicia VmHWM, asi el pico es de cada caso y no del proceso
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _pico_rss() -> int | None:
+    try:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith("VmHWM:"):
+                    return int(linea.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == "darwin" else pico * 1024
+
+
+def _casos_suite(aldeas, ninjas, misiones, mundo, nombres, tmp):
+    # cada caso devuelve una funcion sin argumentos y la cantidad de registros que procesa
+    fabrica = nr.HojaFactory()
+    pares = list(zip(ninjas, ninjas[1:] + ninjas[:1]))
+    buscados = [n.nombre.lower() for n in ninjas]
+    registros = len(ninjas) + len(misiones)
+    ruta = os.path.join(tmp, "suite")
+
+    def build():
+        for nombre in nombres:
+            (nr.NinjaBuilder()
+             .with_nombre(nombre)
+             .with_rango(nr.RangoNinja.CHUNIN)
+             .with_estadisticas(nr.Estadisticas(60, 50, 100))
+             .build())
+
+    def pelear():
+        for a, b in pares:
+            a.pelear(b)
+
+    def entrenar():
+        for n in ninjas:
+            n.entrenar()
+
+    def buscar():
+        buscar_ninja = mundo.registro.buscar_ninja
+        for nombre in buscados:
+            buscar_ninja(nombre)
+
+    return {
+        "crear_ninja": (lambda: [fabrica.crear_ninja(n) for n in nombres], len(nombres)),
+        "build": (build, len(nombres)),
+        "pelear": (pelear, len(pares)),
+        "entrenar": (entrenar, len(ninjas)),
+        "buscar_ninja": (buscar, len(buscados)),
+        "exportar_texto": (lambda: nr.exportar_texto(ninjas, misiones, ruta), registros),
+        "exportar_json": (lambda: nr.exportar_json(ninjas, misiones, ruta), registros),
+        "exportar_ndjson": (lambda: nr.exportar_ndjson(ninjas, misiones, ruta), registros),
+        "exportar_xml": (lambda: nr.exportar_xml(ninjas, misiones, ruta), registros),
+        "exportar_excel": (lambda: nr.exportar_excel(ninjas, misiones, ruta + ".xlsx"), registros),
+    }
+
+
+CASOS_SUITE = ("crear_ninja", "build", "pelear", "entrenar", "buscar_ninja", "exportar_texto", "exportar_json",
+               "exportar_ndjson", "exportar_xml", "exportar_excel")
+
+
+def _medir_caso(funcion, memoria: bool, repeticiones: int = 1) -> dict:
+    # el tiempo es el mejor de las repeticiones, el ruido de la maquina solo puede sumar
+    _reiniciar_pico_rss()
+    segundos = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        segundos = min(segundos, time.perf_counter() - inicio)
+    rss = _pico_rss()
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        funcion()
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {"segundos": segundos, "pico_tracemalloc": pico, "pico_rss": rss}
+
+
+def _comparar(resultados: list[dict], baseline: dict, tolerancia: float) -> list[str]:
+    base = {(r["caso"], r["ninjas"]): r for r in baseline["resultados"]}
+    regresiones = []
+    for r in resultados:
+        b = base.get((r["caso"], r["ninjas"]))
+        if b is None:
+            continue
+        if r["por_segundo"] < b["por_segundo"] * (1 - tolerancia):
+            regresiones.append(f"{r['caso']} con {r['ninjas']:,}: {r['por_segundo']:,.0f} reg/s "
+                               f"contra {b['por_segundo']:,.0f} ({r['por_segundo'] / b['por_segundo'] - 1:+.0%})")
+        for campo in ("pico_tracemalloc", "pico_rss"):
+            if r[campo] and b.get(campo) and r[campo] > b[campo] * (1 + tolerancia):
+                regresiones.append(f"{r['caso']} con {r['ninjas']:,}: {campo} {r[campo] / 2**20:,.1f} MB "
+                                   f"contra {b[campo] / 2**20:,.1f} MB ({r[campo] / b[campo] - 1:+.0%})")
+    return regresiones
+
+
+def bench_suite(args):
+    casos = args.casos or CASOS_SUITE
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.escalas:
+            aldeas, ninjas, misiones = generar_mundo(n, n // 10)
+            mundo = nr.Mundo(aldeas, ninjas, misiones)
+            nombres = nr.GeneradorNombres(args.seed).nombres(n)
+            disponibles = _casos_suite(aldeas, ninjas, misiones, mundo, nombres, tmp)
+            print(f"--- {n:,} ninjas, {len(misiones):,} misiones")
+            for caso in casos:
+                funcion, registros = disponibles[caso]
+                medicion = _medir_caso(funcion, memoria=not args.sin_memoria, repeticiones=args.repeticiones)
+                imprimir(caso, registros, medicion["segundos"], medicion["pico_tracemalloc"])
+                resultados.append({"caso": caso, "ninjas": n, "registros": registros,
+                                   "por_segundo": registros / medicion["segundos"], **medicion})
+            del aldeas, ninjas, misiones, mundo, nombres, disponibles
+
+    salida = {
+        "meta": {"fecha": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "plataforma": platform.platform(), "cpus": os.cpu_count()},
+        "resultados": resultados,
+    }
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(salida, f, indent=2)
+        print(f"resultados guardados en {os.path.abspath(args.salida)}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regresiones = _comparar(resultados, baseline, args.tolerancia)
+        if regresiones:
+            print(f"{len(regresiones)} regresiones contra {args.baseline} (tolerancia {args.tolerancia:.0%}):")
+            for r in regresiones:
+                print(f"  {r}")
+            sys.exit(1)
+        print(f"sin regresiones contra {args.baseline} (tolerancia {args.tolerancia:.0%})")
+
+
+# metricas: desglose por etapa de una exportacion y costo de tenerlas prendidas
+
+def bench_metricas(args):
+    _, ninjas, misiones = generar_mundo(args.ninjas, args.misiones)
+    registros = len(ninjas) + len(misiones)
+    exportar = getattr(nr, f"exportar_{args.formato}")
+    extension = ".xlsx" if args.formato == "excel" else ""
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "bench" + extension)
+        apagadas, _ = medir(exportar, ninjas, misiones, ruta, memoria=False)
+        imprimir("metricas apagadas", registros, apagadas, None)
+        nr.metricas.reiniciar()
+        nr.metricas.activar(perfilar=args.perfil, ruta_perfil=args.perfil_ruta)
+        try:
+            prendidas, _ = medir(exportar, ninjas, misiones, ruta, memoria=False)
+        finally:
+            nr.metricas.desactivar()
+        imprimir("metricas prendidas", registros, prendidas, None)
+    print(f"sobrecosto con metricas prendidas: {prendidas / apagadas - 1:+.1%}")
+    total = nr.metricas.tiempos[f"exportar_{args.formato}.total"][1]
+    for nombre, (llamadas, segundos) in sorted(nr.metricas.tiempos.items()):
+        print(f"  {nombre:<42} {llamadas:>10,} llamadas {segundos:9.3f} s {segundos / total:7.1%}")
+    if args.salida:
+        print(nr.metricas.guardar(args.salida))
+
+
+# cache de combates: parejas que se repiten entre entrenamientos
+
+def bench_cache(args):
+    _, ninjas, _ = generar_mundo(args.ninjas)
+    rng = random.Random(args.seed)
+    parejas = [tuple(rng.sample(ninjas, 2)) for _ in range(args.parejas)]
+    peleas = [parejas[rng.randrange(len(parejas))] for _ in range(args.peleas)]
+
+    def sin_cache():
+        for a, b in peleas:
+            a.pelear(b)
+
+    def con_cache(cache):
+        for a, b in peleas:
+            a.pelear(b, cache)
+
+    print(f"{args.peleas:,} peleas entre {len(parejas):,} parejas distintas")
+    segundos, _ = medir(sin_cache, memoria=False)
+    imprimir("sin cache", len(peleas), segundos, None)
+    for compacto in (False, True):
+        cache = nr.CacheCombates(args.capacidad, compacto=compacto)
+        segundos, _ = medir(con_cache, cache, memoria=False)
+        imprimir("cache compacto" if compacto else "cache con texto", len(peleas), segundos, None)
+        print(f"  {cache}")
+
+
+# batallas por equipos: una guerra grande y muchas batallas chicas en paralelo
+
+def bench_batalla(args):
+    nombres = nr.GeneradorNombres(args.seed)
+    por_fabrica = -(-args.por_lado // len(nr.FABRICAS))
+    a, b = nr.Aldea("Hoja"), nr.Aldea("Arena")
+    nr.poblar_aldea(a, {o: por_fabrica for o in nr.FABRICAS}, nombres)
+    nr.poblar_aldea(b, {o: por_fabrica for o in nr.FABRICAS}, nombres)
+    inicio = time.perf_counter()
+    resultado = nr.guerra_aldeas(a, b, seed=args.seed, max_rondas=args.rondas)
+    segundos = time.perf_counter() - inicio
+    print(f"guerra {len(a.ninjas):,} contra {len(b.ninjas):,}: {segundos:.3f} s")
+    print(f"  {resultado}")
+
+    total = args.batallas * args.tam_equipo * 2
+    roster = nr.Roster(total)
+    for fabrica in nr.FABRICAS.values():
+        fabrica.crear_roster(nombres.nombres(-(-total // len(nr.FABRICAS))), roster=roster)
+    orden = np.random.default_rng(args.seed).permutation(len(roster))[:total]
+    equipos = orden.reshape(2, args.batallas, args.tam_equipo)
+    inicio = time.perf_counter()
+    motor = nr.MotorBatallas.desde_roster(roster, equipos[0], equipos[1], seed=args.seed)
+    resultado = motor.simular(args.rondas)
+    segundos = time.perf_counter() - inicio
+    print(f"{args.batallas:,} batallas de {args.tam_equipo} contra {args.tam_equipo}: {segundos:.3f} s, "
+          f"{motor.ronda} rondas")
+    print(f"  {resultado}")
+
+
+# analitica: top-k y promedios mantenidos con eventos contra recorrer todo
+
+def bench_analitica(args):
+    aldeas, ninjas, _ = generar_mundo(args.ninjas)
+    inicio = time.perf_counter()
+    analitica = nr.Analitica(aldeas)
+    print(f"carga inicial de {len(ninjas):,} ninjas: {time.perf_counter() - inicio:.3f} s")
+    rng = random.Random(args.seed)
+    elegidos = [rng.choice(ninjas) for _ in range(args.entrenamientos)]
+
+    def entrenar():
+        for n in elegidos:
+            n.entrenar(inc_ataque=1)
+
+    segundos, _ = medir(entrenar, memoria=False)
+    imprimir("entrenar sin analitica", len(elegidos), segundos, None)
+    nr.suscribir(analitica)
+    try:
+        segundos, _ = medir(entrenar, memoria=False)
+        imprimir("entrenar con analitica", len(elegidos), segundos, None)
+    finally:
+        nr.desuscribir(analitica)
+
+    inicio = time.perf_counter()
+    for _ in range(args.consultas):
+        analitica.top("ataque", args.k)
+        analitica.promedios(aldeas[0])
+    segundos = (time.perf_counter() - inicio) / args.consultas
+    print(f"{'top-k + promedios':<28} {segundos * 1e6:9.1f} us por consulta")
+    inicio = time.perf_counter()
+    sorted(ninjas, key=lambda n: n.estadisticas.ataque, reverse=True)[:args.k]
+    sum(n.estadisticas.ataque for n in aldeas[0].ninjas) / len(aldeas[0].ninjas)
+    print(f"{'recorriendo todo':<28} {(time.perf_counter() - inicio) * 1e6:9.1f} us por consulta")
+
+
+# bitacora: eventos por segundo con group commit y tiempo de arranque reproduciendo el log
+
+def bench_eventos(args):
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        bitacora = nr.Bitacora(tmp, lote=args.lote, fsync=not args.sin_fsync, compactar_cada=None)
+        mundo = bitacora.recuperar()
+        try:
+            inicio = time.perf_counter()
+            for origen in nr.FABRICAS:
+                mundo.crear_aldea(origen)
+                mundo.poblar(origen, {origen: -(-args.ninjas // len(nr.FABRICAS))}, nr.GeneradorNombres(args.seed))
+            bitacora.sincronizar()
+            segundos = time.perf_counter() - inicio
+            imprimir("crear ninjas con bitacora", len(mundo.ninjas), segundos, None)
+
+            elegidos = [rng.choice(mundo.ninjas) for _ in range(args.eventos)]
+            inicio = time.perf_counter()
+            for n in elegidos:
+                n.entrenar(inc_ataque=1)
+            bitacora.sincronizar()
+            segundos = time.perf_counter() - inicio
+            imprimir("entrenar con bitacora", len(elegidos), segundos, None)
+            print(f"  {bitacora.eventos:,} eventos, {bitacora.sincronizaciones:,} fsync")
+        finally:
+            bitacora.cerrar()
+        esperado = nr.exportar_json(mundo.ninjas, mundo.misiones)
+
+        tamano = os.path.getsize(bitacora.ruta_eventos(bitacora.generacion))
+        inicio = time.perf_counter()
+        bitacora = nr.Bitacora(tmp, compactar_cada=None)
+        mundo = bitacora.recuperar()
+        segundos = time.perf_counter() - inicio
+        print(f"{'arranque reproduciendo log':<28} {segundos:8.3f} s  {bitacora.reproducidos:,} eventos, "
+              f"{tamano / 2 ** 20:.1f} MiB")
+        inicio = time.perf_counter()
+        bitacora.compactar()
+        print(f"{'compactar':<28} {time.perf_counter() - inicio:8.3f} s")
+        bitacora.cerrar()
+
+        inicio = time.perf_counter()
+        bitacora = nr.Bitacora(tmp, compactar_cada=None)
+        mundo = bitacora.recuperar()
+        segundos = time.perf_counter() - inicio
+        bitacora.cerrar()
+        print(f"{'arranque desde snapshot':<28} {segundos:8.3f} s")
+        print("mundo reconstruido igual:", nr.exportar_json(mundo.ninjas, mundo.misiones) == esperado)
+
+    # compactacion forzada en el umbral, con un volcado por evento, y arranque despues
+    with tempfile.TemporaryDirectory() as tmp:
+        bitacora = nr.Bitacora(tmp, lote=1, compactar_cada=3)
+        mundo = bitacora.recuperar()
+        try:
+            mundo.crear_aldea("hoja")
+            for i in range(args.compactaciones * 3):
+                mundo.crear_ninja(f"ninja-{i}", "hoja")
+                mundo.entrenar(f"ninja-{rng.randrange(i + 1)}", inc_ataque=1)
+                bitacora.sincronizar()
+            generaciones = bitacora.generacion
+        finally:
+            bitacora.cerrar()
+        esperado = nr.exportar_json(mundo.ninjas, mundo.misiones)
+        bitacora = nr.Bitacora(tmp)
+        mundo = bitacora.recuperar()
+        bitacora.cerrar()
+        print(f"recuperado tras {generaciones} compactaciones:",
+              nr.exportar_json(mundo.ninjas, mundo.misiones) == esperado)
+
+
+# arranque: cuanto tarda "import naruto" segun python -X importtime, contra cargar de entrada
+# numpy, pandas y openpyxl como antes de que se importaran recien al usarlos
+
+def _importtime(codigo: str) -> tuple[float, list[tuple[int, str]]]:
+    salida = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stderr
+    total = 0
+    modulos = []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        if len(nombre) - len(nombre.lstrip()) == 1:
+            # solo los imports de primer nivel, los anidados ya estan en su acumulado
+            total += int(acumulado)
+            modulos.append((int(acumulado), nombre.strip()))
+    return total / 1e3, sorted(modulos, reverse=True)
+
+
+def bench_arranque(args):
+    casos = [("import naruto", "import naruto"),
+             ("con numpy, pandas, openpyxl", "import numpy, pandas, openpyxl, naruto")]
+    for nombre, codigo in casos:
+        tiempos = []
+        for _ in range(args.repeticiones):
+            ms, modulos = _importtime(codigo)
+            tiempos.append(ms)
+        print(f"{nombre:<28} {statistics.median(tiempos):9.1f} ms (mediana de {args.repeticiones})")
+        for acumulado, modulo in modulos[:args.top]:
+            print(f"    {modulo:<24} {acumulado / 1e3:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmarks del mundo ninja")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("xml", help="exportar_xml por bloques contra concatenación de strings")
+    p.add_argument("--ninjas", type=int, default=100_000)
+    p.add_argument("--misiones", type=int, default=10_000)
+    p.add_argument("--sin-memoria", action="store_true", help="no medir el pico con tracemalloc")
+    p.set_defaults(funcion=bench_xml)
+
+    p = sub.add_parser("memoria", help="bytes por ninja creados con fabrica, antes y despues de __slots__")
+    p.add_argument("--ninjas", type=int, default=1_000_000)
+    p.set_defaults(funcion=bench_memoria)
+
+    p = sub.add_parser("torneo", help="peleas por segundo de un torneo contra la cantidad de workers")
+    p.add_argument("--participantes", type=int, default=100_000)
+    p.add_argument("--formato", choices=("eliminacion", "suizo", "todos"), default="suizo")
+    p.add_argument("--rondas", type=int, default=None)
+    p.add_argument("--workers", type=int, nargs="*", default=None)
+    p.set_defaults(funcion=bench_torneo)
+
+    p = sub.add_parser("incremental", help="re-exportar con ExportIncremental despues de entrenar a unos pocos")
+    p.add_argument("--ninjas", type=int, default=1_000_000)
+    p.add_argument("--misiones", type=int, default=10_000)
+    p.add_argument("--entrenados", type=int, default=100)
+    p.add_argument("--formato", choices=("json", "xml", "texto"), default="json")
+    p.set_defaults(funcion=bench_incremental)
+
+    p = sub.add_parser("servidor", help="latencia p50/p99 del servidor asyncio con muchos clientes concurrentes")
+    p.add_argument("--clientes", type=int, default=1_000)
+    p.add_argument("--pedidos", type=int, default=20, help="pedidos por cliente")
+    p.add_argument("--ninjas", type=int, default=10_000)
+    p.set_defaults(funcion=bench_servidor)
+
+    p = sub.add_parser("creacion", help="ninjas por segundo creando uno por uno contra por lote")
+    p.add_argument("--ninjas", type=int, default=1_000_000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--sin-memoria", action="store_true", help="no medir el pico con tracemalloc")
+    p.set_defaults(funcion=bench_creacion)
+
+    p = sub.add_parser("suite", help="creacion, combate, entrenamiento, busqueda y exportaciones a varias escalas")
+    p.add_argument("--escalas", type=_cantidad, nargs="+", default=[1_000, 10_000, 100_000],
+                   help="cantidades de ninjas, acepta sufijos k y M (1k 100k 10M)")
+    p.add_argument("--casos", choices=CASOS_SUITE, nargs="+", default=None)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeticiones", type=int, default=3, help="se guarda el mejor tiempo")
+    p.add_argument("--sin-memoria", action="store_true", help="no medir el pico con tracemalloc")
+    p.add_argument("--salida", default=None, help="archivo json donde guardar los resultados")
+    p.add_argument("--baseline", default=None, help="resultados anteriores contra los que comparar")
+    p.add_argument("--tolerancia", type=float, default=0.10, help="caida relativa que cuenta como regresion")
+    p.set_defaults(funcion=bench_suite)
+
+    p = sub.add_parser("metricas", help="tiempo por etapa de una exportacion con las metricas prendidas")
+    p.add_argument("--formato", choices=("texto", "json", "ndjson", "xml", "excel"), default="json")
+    p.add_argument("--ninjas", type=int, default=100_000)
+    p.add_argument("--misiones", type=int, default=10_000)
+    p.add_argument("--perfil", action="store_true", help="correr la exportacion dentro de cProfile")
+    p.add_argument("--perfil-ruta", default="perfil", help="prefijo del archivo .prof")
+    p.add_argument("--salida", default=None, help="guardar las metricas (.prom para prometheus, si no json)")
+    p.set_defaults(funcion=bench_metricas)
+
+    p = sub.add_parser("cache", help="peleas por segundo con y sin CacheCombates")
+    p.add_argument("--ninjas", type=int, default=10_000)
+    p.add_argument("--parejas", type=int, default=50_000)
+    p.add_argument("--peleas", type=int, default=1_000_000)
+    p.add_argument("--capacidad", type=int, default=100_000)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(funcion=bench_cache)
+
+    p = sub.add_parser("batalla", help="guerra entre aldeas y muchas batallas por equipos a la vez")
+    p.add_argument("--por-lado", type=int, default=10_000)
+    p.add_argument("--batallas", type=int, default=10_000)
+    p.add_argument("--tam-equipo", type=int, default=5)
+    p.add_argument("--rondas", type=int, default=100)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(funcion=bench_batalla)
+
+    p = sub.add_parser("analitica", help="consultas de top-k y promedios con Analitica contra recorrer el roster")
+    p.add_argument("--ninjas", type=int, default=1_000_000)
+    p.add_argument("--entrenamientos", type=int, default=200_000)
+    p.add_argument("--consultas", type=int, default=1_000)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(funcion=bench_analitica)
+
+    p = sub.add_parser("eventos", help="eventos por segundo en la bitacora y arranque reproduciendo el log")
+    p.add_argument("--ninjas", type=int, default=100_000)
+    p.add_argument("--eventos", type=int, default=1_000_000)
+    p.add_argument("--lote", type=int, default=4096)
+    p.add_argument("--sin-fsync", action="store_true")
+    p.add_argument("--compactaciones", type=int, default=20)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(funcion=bench_eventos)
+
+    p = sub.add_parser("arranque", help="tiempo de import de naruto con python -X importtime")
+    p.add_argument("--repeticiones", type=int, default=5)
+    p.add_argument("--top", type=int, default=5)
+    p.set_defaults(funcion=bench_arranque)
+
+    args = parser.parse_args()
+    args.funcion(args)
+
+
+if __name__ == "__main__":
+    main()
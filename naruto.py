@@ -1,9 +1,46 @@
+import cProfile
+import functools
+import gc
+import heapq
+import importlib
+import io
 import json
+import mmap
+import numbers
 import os
-import pandas as pd
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zipfile
 from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count, islice
+from operator import attrgetter
 from enum import Enum
-import openpyxl
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+
+
+class _ModuloPerezoso:
+    # numpy se importa recien la primera vez que se usa (roster, snapshot, batallas, torneos).
+    # despues el global np pasa a ser el modulo real, asi no queda este paso extra en cada uso;
+    # el modelo y los exportadores de texto/json/xml funcionan sin numpy instalado
+    def __init__(self, nombre: str, alias: str):
+        self._nombre = nombre
+        self._alias = alias
+
+    def __getattr__(self, atributo: str):
+        modulo = importlib.import_module(self._nombre)
+        globals()[self._alias] = modulo
+        return getattr(modulo, atributo)
+
+
+np = _ModuloPerezoso("numpy", "np")
 
 
 # enum y clases de dominio, lista a la izquierda 
@@ -26,23 +63,46 @@ class RangoMision(Enum):
 
 
 class Estadisticas:
+    __slots__ = ("ataque", "defensa", "chakra", "version")
+
     def __init__(self, ataque: int, defensa: int, chakra: int):
         self.ataque = ataque
         self.defensa = defensa
         self.chakra = chakra
+        # sube con cada entrenamiento, la usa CacheCombates para saber si un resultado sigue valiendo
+        self.version = 0
 
     def entrenar(self, inc_ataque=0, inc_defensa=0, inc_chakra=0):
         self.ataque += inc_ataque
         self.defensa += inc_defensa
         self.chakra += inc_chakra
+        self.version += 1
+        if metricas.activo:
+            metricas.contar("entrenamientos")
+        for obs in _observadores:
+            obs.entrenado(self)
 
 
 class Jutsu:
+    __slots__ = ("nombre", "costo_chakra", "efecto")
+
+    # flyweight: las fabricas reparten la misma instancia a todos sus ninjas,
+    # por eso un jutsu compartido no se debe modificar
+    _compartidos: dict[tuple[str, int, str], "Jutsu"] = {}
+
     def __init__(self, nombre: str, costo_chakra: int, efecto: str):
         self.nombre = nombre
         self.costo_chakra = costo_chakra
         self.efecto = efecto
 
+    @classmethod
+    def compartido(cls, nombre: str, costo_chakra: int, efecto: str) -> "Jutsu":
+        clave = (nombre, costo_chakra, efecto)
+        jutsu = cls._compartidos.get(clave)
+        if jutsu is None:
+            jutsu = cls._compartidos[clave] = cls(nombre, costo_chakra, efecto)
+        return jutsu
+
 
 class Aldea:
     def __init__(self, nombre: str):
@@ -52,9 +112,29 @@ class Aldea:
     def add_ninja(self, ninja: "Ninja"):
         self.ninjas.append(ninja)
         ninja.aldea = self
+        for obs in _observadores:
+            obs.ninja_asignado(ninja, self)
+
+    def add_ninjas(self, ninjas: Iterable["Ninja"]):
+        ninjas = list(ninjas)
+        self.ninjas.extend(ninjas)
+        for ninja in ninjas:
+            ninja.aldea = self
+        for obs in _observadores:
+            for ninja in ninjas:
+                obs.ninja_asignado(ninja, self)
+
+
+def texto_pelea(atacante: str, defensor: str, gana: bool) -> str:
+    if gana:
+        return f"{atacante} gana contra {defensor}"
+    else:
+        return f"{defensor} resiste el ataque de {atacante}"
 
 
 class Ninja:
+    __slots__ = ("nombre", "rango", "estadisticas", "jutsus", "aldea")
+
     def __init__(self, nombre: str, rango: RangoNinja, estadisticas: Estadisticas):
         self.nombre = nombre
         self.rango = rango
@@ -62,20 +142,28 @@ class Ninja:
         self.jutsus: list[Jutsu] = []
         self.aldea: Aldea | None = None
 
+    def add_jutsu(self, jutsu: Jutsu):
+        self.jutsus.append(jutsu)
+        for obs in _observadores:
+            obs.jutsu_agregado(self, jutsu)
+
     def entrenar(self, inc_ataque=5, inc_chakra=10, inc_defensa=0):
-        self.estadisticas.entrenar(inc_ataque, inc_defensa, inc_chakra)
+        self.estadisticas.entrenar(inc_ataque=inc_ataque, inc_defensa=inc_defensa, inc_chakra=inc_chakra)
 
-    def pelear(self, oponente: "Ninja") -> str:
-        if self.estadisticas.ataque > oponente.estadisticas.defensa:
-            return f"{self.nombre} gana contra {oponente.nombre}"
-        else:
-            return f"{oponente.nombre} resiste el ataque de {self.nombre}"
+    def pelear(self, oponente: "Ninja", cache: "CacheCombates | None" = None) -> str:
+        if metricas.activo:
+            metricas.contar("peleas")
+        if cache is not None:
+            return cache.pelear(self, oponente)
+        return texto_pelea(self.nombre, oponente.nombre, self.estadisticas.ataque > oponente.estadisticas.defensa)
 
     def accept(self, visitor: "ExportVisitor"):
         return visitor.visit_ninja(self)
 
 
 class Mision:
+    __slots__ = ("rango", "recompensa", "rango_requerido")
+
     def __init__(self, rango: RangoMision, recompensa: int, rango_requerido: RangoNinja):
         self.rango = rango
         self.recompensa = recompensa
@@ -85,6 +173,430 @@ class Mision:
         return visitor.visit_mision(self)
 
 
+#observer: otros componentes se enteran de los cambios del mundo sin que el modelo los conozca
+
+class Observador:
+    def ninja_asignado(self, ninja: Ninja, aldea: Aldea):
+        pass
+
+    def jutsu_agregado(self, ninja: Ninja, jutsu: Jutsu):
+        pass
+
+    def entrenado(self, estadisticas: Estadisticas):
+        pass
+
+
+_observadores: list[Observador] = []
+
+
+def suscribir(observador: Observador):
+    if observador not in _observadores:
+        _observadores.append(observador)
+
+
+def desuscribir(observador: Observador):
+    if observador in _observadores:
+        _observadores.remove(observador)
+
+
+#registro con indices para no recorrer listas en cada busqueda
+
+class Registro(Observador):
+    # indices hash por nombre (sin distinguir mayusculas) y secundarios por rango y (aldea, rango).
+    # solo indexa aldeas registradas y los ninjas que se asignan a ellas
+    def __init__(self):
+        self.aldeas_por_nombre: dict[str, Aldea] = {}
+        self.ninjas_por_nombre: dict[str, Ninja] = {}
+        self.por_rango: dict[RangoNinja, list[Ninja]] = {r: [] for r in RangoNinja}
+        self.por_aldea_rango: dict[tuple[Aldea, RangoNinja], list[Ninja]] = {}
+        self._aldeas: set[Aldea] = set()
+        self._aldea_de: dict[Ninja, Aldea | None] = {}
+
+    @staticmethod
+    def _clave(nombre: str) -> str:
+        return nombre.strip().lower()
+
+    def registrar_aldea(self, aldea: Aldea) -> Aldea:
+        # con nombres repetidos gana la primera, igual que la busqueda lineal de antes
+        self.aldeas_por_nombre.setdefault(self._clave(aldea.nombre), aldea)
+        self._aldeas.add(aldea)
+        for ninja in aldea.ninjas:
+            if ninja.aldea is aldea:
+                self.registrar_ninja(ninja)
+        return aldea
+
+    def registrar_ninja(self, ninja: Ninja) -> Ninja:
+        aldea = ninja.aldea if ninja.aldea in self._aldeas else None
+        if ninja in self._aldea_de:
+            anterior = self._aldea_de[ninja]
+            if anterior is aldea:
+                return ninja
+            if anterior is not None:
+                self.por_aldea_rango[(anterior, ninja.rango)].remove(ninja)
+        else:
+            self.ninjas_por_nombre.setdefault(self._clave(ninja.nombre), ninja)
+            self.por_rango[ninja.rango].append(ninja)
+        self._aldea_de[ninja] = aldea
+        if aldea is not None:
+            self.por_aldea_rango.setdefault((aldea, ninja.rango), []).append(ninja)
+        return ninja
+
+    def ninja_asignado(self, ninja: Ninja, aldea: Aldea):
+        if aldea in self._aldeas:
+            self.registrar_ninja(ninja)
+
+    def buscar_aldea(self, nombre: str) -> Aldea | None:
+        return self.aldeas_por_nombre.get(self._clave(nombre))
+
+    def buscar_ninja(self, nombre: str) -> Ninja | None:
+        return self.ninjas_por_nombre.get(self._clave(nombre))
+
+    def ninjas_de(self, rango: RangoNinja | None = None, aldea: Aldea | None = None) -> list[Ninja]:
+        if rango is not None and aldea is not None:
+            return self.por_aldea_rango.get((aldea, rango), [])
+        if rango is not None:
+            return self.por_rango[rango]
+        if aldea is not None:
+            return [n for r in RangoNinja for n in self.por_aldea_rango.get((aldea, r), [])]
+        return list(self._aldea_de)
+
+
+# metricas opcionales: contadores y tiempos para ver en que se va una exportacion
+# (dispatch del visitor, serializacion, escritura). apagadas casi no cuestan: los
+# exportadores solo envuelven visitor y archivo si metricas.activo, y los contadores
+# de peleas y entrenamientos miran un booleano antes de sumar
+
+class _ArchivoMedido:
+    def __init__(self, f, tiempo: list):
+        self.f = f
+        self._tiempo = tiempo
+
+    def write(self, texto: str) -> int:
+        inicio = time.perf_counter()
+        escrito = self.f.write(texto)
+        self._tiempo[0] += 1
+        self._tiempo[1] += time.perf_counter() - inicio
+        return escrito
+
+    def flush(self):
+        self.f.flush()
+
+
+class Metricas:
+    def __init__(self):
+        self.activo = False
+        self.perfilar = False
+        self.ruta_perfil = "perfil"
+        self.contadores: dict[str, int] = {}
+        self.tiempos: dict[str, list] = {}  # nombre -> [llamadas, segundos]
+
+    def activar(self, perfilar: bool = False, ruta_perfil: str | None = None):
+        # con perfilar cada exportar_* corre dentro de cProfile y deja <ruta_perfil>-<exportacion>.prof
+        self.activo = True
+        self.perfilar = perfilar
+        if ruta_perfil:
+            self.ruta_perfil = ruta_perfil
+
+    def desactivar(self):
+        self.activo = False
+        self.perfilar = False
+
+    def reiniciar(self):
+        self.contadores.clear()
+        self.tiempos.clear()
+
+    def contar(self, nombre: str, cantidad: int = 1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def _tiempo(self, nombre: str) -> list:
+        return self.tiempos.setdefault(nombre, [0, 0.0])
+
+    def envolver(self, funcion, *nombres: str):
+        # devuelve la funcion tal cual si estan apagadas, asi el camino normal no paga nada
+        if not self.activo:
+            return funcion
+        tiempos = [self._tiempo(n) for n in nombres]
+        reloj = time.perf_counter
+
+        def medida(*args, **kwargs):
+            inicio = reloj()
+            resultado = funcion(*args, **kwargs)
+            transcurrido = reloj() - inicio
+            for t in tiempos:
+                t[0] += 1
+                t[1] += transcurrido
+            return resultado
+        return medida
+
+    def instrumentar(self, visitor: "ExportVisitor", exportacion: str) -> "ExportVisitor":
+        # los visit_* medidos quedan como atributos de la instancia, la clase no se toca
+        if self.activo:
+            clase = type(visitor).__name__
+            for metodo in ("visit_ninja", "visit_mision"):
+                setattr(visitor, metodo, self.envolver(getattr(visitor, metodo), f"{clase}.{metodo}",
+                                                       f"{exportacion}.renderizar"))
+        return visitor
+
+    def archivo(self, f, exportacion: str):
+        return _ArchivoMedido(f, self._tiempo(f"{exportacion}.escribir")) if self.activo else f
+
+    def medir_exportacion(self, funcion):
+        nombre = funcion.__name__
+
+        @functools.wraps(funcion)
+        def exportacion(*args, **kwargs):
+            if not self.activo:
+                return funcion(*args, **kwargs)
+            perfil = cProfile.Profile() if self.perfilar else None
+            inicio = time.perf_counter()
+            try:
+                if perfil is None:
+                    return funcion(*args, **kwargs)
+                return perfil.runcall(funcion, *args, **kwargs)
+            finally:
+                t = self._tiempo(f"{nombre}.total")
+                t[0] += 1
+                t[1] += time.perf_counter() - inicio
+                if perfil is not None:
+                    perfil.dump_stats(f"{self.ruta_perfil}-{nombre}.prof")
+        return exportacion
+
+    def a_dict(self) -> dict:
+        return {
+            "contadores": dict(self.contadores),
+            "tiempos": {n: {"llamadas": c, "segundos": s} for n, (c, s) in sorted(self.tiempos.items())},
+        }
+
+    def prometheus(self) -> str:
+        lineas = ["# TYPE naruto_eventos_total counter"]
+        for nombre, valor in sorted(self.contadores.items()):
+            lineas.append(f'naruto_eventos_total{{nombre="{nombre}"}} {valor}')
+        lineas.append("# TYPE naruto_tiempo_segundos summary")
+        for nombre, (llamadas, segundos) in sorted(self.tiempos.items()):
+            lineas.append(f'naruto_tiempo_segundos_sum{{nombre="{nombre}"}} {segundos:.9f}')
+            lineas.append(f'naruto_tiempo_segundos_count{{nombre="{nombre}"}} {llamadas}')
+        return "\n".join(lineas) + "\n"
+
+    def guardar(self, ruta: str) -> str:
+        # .prom o .txt en formato de texto de prometheus, cualquier otra cosa en json
+        full_path = os.path.abspath(ruta)
+        with open(full_path, "w", encoding="utf-8") as f:
+            if ruta.endswith((".prom", ".txt")):
+                f.write(self.prometheus())
+            else:
+                json.dump(self.a_dict(), f, indent=2, ensure_ascii=False)
+        return f"Métricas guardadas en: {full_path}"
+
+
+metricas = Metricas()
+
+
+# analitica: agregados por aldea y rango que se mantienen solos con los eventos del
+# observador, asi los promedios y conteos son O(1) y el top-k no recorre el roster.
+# el top-k usa un heap por aldea y campo con invalidacion perezosa: cada cambio empuja una
+# entrada nueva solo en los campos que cambiaron, y una entrada vale mientras su valor siga
+# siendo el actual; las vencidas se descartan cuando aparecen arriba. el top global junta
+# los top-k de cada aldea, asi cada cambio toca un heap por campo y no dos
+
+class Analitica(Observador):
+    CAMPOS = ("ataque", "defensa", "chakra")
+
+    def __init__(self, aldeas: Iterable[Aldea] = ()):
+        self.cantidad: dict[Aldea, int] = {}
+        self.sumas: dict[Aldea, list[int]] = {}  # aldea -> [ataque, defensa, chakra]
+        self.por_rango: dict[Aldea, dict[RangoNinja, int]] = {}
+        self._valores: dict[Ninja, tuple[int, int, int]] = {}
+        self._aldea_de: dict[Ninja, Aldea] = {}
+        self._ninja_de: dict[int, Ninja] = {}  # id(estadisticas) -> ninja
+        self._heaps: dict[tuple[Aldea, int], list] = {}
+        self._secuencia = count()
+        # el bus de observadores es global: solo se escuchan las aldeas de este mundo, si no un
+        # import o un snapshot que arman otro mundo se meterian en los rankings. con una lista
+        # (mundo.aldeas) se guarda la misma, asi las aldeas que se crean despues tambien entran
+        self._ambito = aldeas if isinstance(aldeas, list) else list(aldeas)
+        self.cargar(self._ambito)
+        self._vistas = len(self._ambito)
+
+    def cargar(self, aldeas: Iterable[Aldea]):
+        # carga masiva: se juntan las entradas y se hace un heapify por heap, O(n) en vez de O(n log n)
+        for aldea in aldeas:
+            self._aldea(aldea)
+            # un ninja puede estar repetido en aldea.ninjas (idas y vueltas, add_ninja dos veces):
+            # el dict lo cuenta una sola vez y conserva el orden
+            nuevos = {}
+            for ninja in aldea.ninjas:
+                if ninja.aldea is aldea:
+                    if ninja in self._aldea_de:
+                        self._asignar(ninja, aldea)
+                    else:
+                        nuevos[ninja] = None
+            nuevos = list(nuevos)
+            estadisticas = [n.estadisticas for n in nuevos]
+            valores = [(e.ataque, e.defensa, e.chakra) for e in estadisticas]
+            self._valores.update(zip(nuevos, valores))
+            self._aldea_de.update(dict.fromkeys(nuevos, aldea))
+            self._ninja_de.update(zip(map(id, estadisticas), nuevos))
+            self.cantidad[aldea] += len(nuevos)
+            for k, suma in enumerate(map(sum, zip(*valores))):
+                self.sumas[aldea][k] += suma
+            for rango in map(attrgetter("rango"), nuevos):
+                self.por_rango[aldea][rango] += 1
+            for k in range(len(self.CAMPOS)):
+                entradas = [(-v[k], s, n) for v, s, n in zip(valores, self._secuencia, nuevos)]
+                self._heap(aldea, k).extend(entradas)
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+
+    def _aldea(self, aldea: Aldea):
+        if aldea not in self.cantidad:
+            self.cantidad[aldea] = 0
+            self.sumas[aldea] = [0, 0, 0]
+            self.por_rango[aldea] = {r: 0 for r in RangoNinja}
+
+    def _heap(self, aldea: Aldea, k: int) -> list:
+        heap = self._heaps.get((aldea, k))
+        if heap is None:
+            heap = self._heaps[(aldea, k)] = []
+        return heap
+
+    def _empujar(self, aldea: Aldea, k: int, valor: int, ninja: Ninja):
+        heap = self._heap(aldea, k)
+        heapq.heappush(heap, (-valor, next(self._secuencia), ninja))
+        if len(heap) > 2 * self.total(aldea) + 64:
+            self._compactar(aldea, k)
+
+    def _vigente(self, entrada: tuple, aldea: Aldea, k: int) -> bool:
+        ninja = entrada[2]
+        valores = self._valores.get(ninja)
+        return valores is not None and valores[k] == -entrada[0] and self._aldea_de[ninja] is aldea
+
+    def _compactar(self, aldea: Aldea, k: int):
+        vistos = set()
+        heap = []
+        for entrada in self._heaps[(aldea, k)]:
+            if entrada[2] not in vistos and self._vigente(entrada, aldea, k):
+                vistos.add(entrada[2])
+                heap.append(entrada)
+        heapq.heapify(heap)
+        self._heaps[(aldea, k)] = heap
+
+    def _asignar(self, ninja: Ninja, aldea: Aldea):
+        anterior = self._aldea_de.get(ninja)
+        if anterior is not None:
+            self.cantidad[anterior] -= 1
+            self.por_rango[anterior][ninja.rango] -= 1
+            suma = self.sumas[anterior]
+            for k, v in enumerate(self._valores[ninja]):
+                suma[k] -= v
+        self._aldea(aldea)
+        est = ninja.estadisticas
+        valores = (est.ataque, est.defensa, est.chakra)
+        self._aldea_de[ninja] = aldea
+        self._valores[ninja] = valores
+        self._ninja_de[id(est)] = ninja
+        self.cantidad[aldea] += 1
+        self.por_rango[aldea][ninja.rango] += 1
+        suma = self.sumas[aldea]
+        for k, v in enumerate(valores):
+            suma[k] += v
+            if anterior is not aldea:
+                self._empujar(aldea, k, v, ninja)
+
+    def _quitar(self, ninja: Ninja):
+        aldea = self._aldea_de.pop(ninja)
+        valores = self._valores.pop(ninja)
+        self._ninja_de.pop(id(ninja.estadisticas), None)
+        self.cantidad[aldea] -= 1
+        self.por_rango[aldea][ninja.rango] -= 1
+        suma = self.sumas[aldea]
+        for k, v in enumerate(valores):
+            suma[k] -= v
+
+    def _en_ambito(self, aldea: Aldea) -> bool:
+        if aldea in self.cantidad:
+            return True
+        # la lista del mundo solo crece: se registran las aldeas nuevas del final
+        for nueva in self._ambito[self._vistas:]:
+            self._aldea(nueva)
+        self._vistas = len(self._ambito)
+        return aldea in self.cantidad
+
+    # eventos del observador
+
+    def ninja_asignado(self, ninja: Ninja, aldea: Aldea):
+        if self._en_ambito(aldea):
+            self._asignar(ninja, aldea)
+        elif ninja in self._aldea_de:
+            # se fue a una aldea de otro mundo: deja de contar aca
+            self._quitar(ninja)
+
+    def entrenado(self, estadisticas: Estadisticas):
+        ninja = self._ninja_de.get(id(estadisticas))
+        if ninja is None or ninja.estadisticas is not estadisticas:
+            return
+        aldea = self._aldea_de[ninja]
+        valores = (estadisticas.ataque, estadisticas.defensa, estadisticas.chakra)
+        viejos = self._valores[ninja]
+        self._valores[ninja] = valores
+        suma = self.sumas[aldea]
+        for k, (nuevo, viejo) in enumerate(zip(valores, viejos)):
+            if nuevo != viejo:
+                suma[k] += nuevo - viejo
+                self._empujar(aldea, k, nuevo, ninja)
+
+    # consultas
+
+    def top(self, campo: str, k: int = 10, aldea: Aldea | None = None) -> list[Ninja]:
+        if campo not in self.CAMPOS:
+            raise ValueError(f"campo desconocido: {campo}")
+        i = self.CAMPOS.index(campo)
+        if aldea is not None:
+            return [e[2] for e in self._top(aldea, i, k)]
+        mejores = heapq.merge(*(self._top(a, i, k) for a in self.cantidad))
+        return [e[2] for e in islice(mejores, k)]
+
+    def _top(self, aldea: Aldea, i: int, k: int) -> list[tuple]:
+        # saca del heap hasta juntar k vigentes distintos y los vuelve a meter: O(k log n),
+        # mas las entradas vencidas que se descartan para siempre
+        heap = self._heaps.get((aldea, i), [])
+        vigentes = []
+        vistos = set()
+        while heap and len(vigentes) < k:
+            entrada = heapq.heappop(heap)
+            if entrada[2] not in vistos and self._vigente(entrada, aldea, i):
+                vistos.add(entrada[2])
+                vigentes.append(entrada)
+        for entrada in vigentes:
+            heapq.heappush(heap, entrada)
+        return vigentes
+
+    def total(self, aldea: Aldea | None = None) -> int:
+        return len(self._aldea_de) if aldea is None else self.cantidad.get(aldea, 0)
+
+    def promedios(self, aldea: Aldea | None = None) -> dict[str, float]:
+        if aldea is None:
+            suma = [sum(s[k] for s in self.sumas.values()) for k in range(len(self.CAMPOS))]
+        else:
+            suma = self.sumas.get(aldea, [0, 0, 0])
+        n = self.total(aldea)
+        return {campo: (s / n if n else 0.0) for campo, s in zip(self.CAMPOS, suma)}
+
+    def conteo_rangos(self, aldea: Aldea | None = None) -> dict[RangoNinja, int]:
+        if aldea is not None:
+            return dict(self.por_rango.get(aldea, {r: 0 for r in RangoNinja}))
+        return {r: sum(c[r] for c in self.por_rango.values()) for r in RangoNinja}
+
+    def filas_resumen(self) -> list[list]:
+        filas = []
+        for aldea in list(self.cantidad) + [None]:
+            p = self.promedios(aldea)
+            rangos = self.conteo_rangos(aldea)
+            filas.append([aldea.nombre if aldea else "Total", self.total(aldea),
+                          round(p["ataque"], 2), round(p["defensa"], 2), round(p["chakra"], 2)]
+                         + [rangos[r] for r in RangoNinja])
+        return filas
+
+
 #visitor para descargar 
 
 class ExportVisitor(ABC):
@@ -122,14 +634,14 @@ class JsonExportVisitor(ExportVisitor):
 class XmlExportVisitor(ExportVisitor):
     def visit_ninja(self, ninja: Ninja):
         jutsus_xml = "".join([
-            f"<jutsu><nombre>{j.nombre}</nombre><costo>{j.costo_chakra}</costo><efecto>{j.efecto}</efecto></jutsu>"
+            f"<jutsu><nombre>{escape(j.nombre)}</nombre><costo>{j.costo_chakra}</costo><efecto>{escape(j.efecto)}</efecto></jutsu>"
             for j in ninja.jutsus
         ])
         return (
             f"<ninja>"
-            f"<nombre>{ninja.nombre}</nombre>"
+            f"<nombre>{escape(ninja.nombre)}</nombre>"
             f"<rango>{ninja.rango.value}</rango>"
-            f"<aldea>{ninja.aldea.nombre if ninja.aldea else ''}</aldea>"
+            f"<aldea>{escape(ninja.aldea.nombre) if ninja.aldea else ''}</aldea>"
             f"<estadisticas>"
             f"<ataque>{ninja.estadisticas.ataque}</ataque>"
             f"<defensa>{ninja.estadisticas.defensa}</defensa>"
@@ -169,6 +681,152 @@ class TextExportVisitor(ExportVisitor):
         )
 
 
+EXCEL_MAX_FILAS = 1_048_576
+COLUMNAS_NINJAS = ["Nombre", "Rango", "Aldea", "Ataque", "Defensa", "Chakra", "Jutsus"]
+COLUMNAS_MISIONES = ["Rango", "Recompensa", "Rango Requerido"]
+COLUMNAS_RESUMEN = (["Aldea", "Ninjas", "Ataque Promedio", "Defensa Promedio", "Chakra Promedio"]
+                    + [r.value for r in RangoNinja])
+
+
+# en excel los jutsus van en una sola celda separados por ", "; una coma o barra dentro
+# del nombre se escapa con una barra invertida para que importar_excel los pueda separar
+
+def _escapar_jutsu(nombre: str) -> str:
+    if "," not in nombre and "\\" not in nombre:
+        return nombre
+    return nombre.replace("\\", "\\\\").replace(",", "\\,")
+
+
+def _separar_jutsus(texto: str) -> list[str]:
+    if "\\" not in texto:
+        return texto.split(", ")
+    nombres, actual, i = [], [], 0
+    while i < len(texto):
+        c = texto[i]
+        if c == "\\" and i + 1 < len(texto):
+            actual.append(texto[i + 1])
+            i += 2
+        elif texto.startswith(", ", i):
+            nombres.append("".join(actual))
+            actual = []
+            i += 2
+        else:
+            actual.append(c)
+            i += 1
+    nombres.append("".join(actual))
+    return nombres
+
+
+def _fila_ninja(ninja: Ninja) -> list:
+    return [
+        ninja.nombre,
+        ninja.rango.value,
+        ninja.aldea.nombre if ninja.aldea else None,
+        ninja.estadisticas.ataque,
+        ninja.estadisticas.defensa,
+        ninja.estadisticas.chakra,
+        ", ".join([_escapar_jutsu(j.nombre) for j in ninja.jutsus])
+    ]
+
+
+def _fila_mision(mision: Mision) -> list:
+    return [mision.rango.value, mision.recompensa, mision.rango_requerido.value]
+
+
+# pandas y openpyxl tardan cientos de ms en importarse, asi que se cargan recien en el
+# primer uso de excel. si no estan instalados se escribe el .xlsx con LibroXlsx, que solo
+# usa la libreria estandar: el mismo zip con xml que genera openpyxl, sin estilos
+
+_XLSX_TIPOS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+               '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+               '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+               '<Default Extension="xml" ContentType="application/xml"/>'
+               '<Override PartName="/xl/workbook.xml" '
+               'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+               '{hojas}</Types>')
+_XLSX_TIPO_HOJA = ('<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                   'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>')
+_XLSX_RELS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+              '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+              '<Relationship Id="rId1" Target="xl/workbook.xml" '
+              'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+              '</Relationships>')
+_XLSX_LIBRO = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+               '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+               'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+               '<sheets>{hojas}</sheets></workbook>')
+_XLSX_LIBRO_RELS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    '{hojas}</Relationships>')
+_XLSX_REL_HOJA = ('<Relationship Id="rId{i}" Target="worksheets/sheet{i}.xml" '
+                  'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>')
+_XLSX_HOJA_INICIO = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                     '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+_XLSX_HOJA_FIN = "</sheetData></worksheet>"
+
+
+def _celda_xlsx(valor) -> str:
+    if valor is None:
+        return "<c/>"
+    tipo = type(valor)
+    if tipo is bool:
+        return f'<c t="b"><v>{int(valor)}</v></c>'
+    if tipo is int or tipo is float or isinstance(valor, numbers.Real):
+        return f"<c><v>{valor}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(valor))}</t></is></c>'
+
+
+class _HojaXlsx:
+    # las filas se van pasando a xml y se guardan en un temporal, asi la memoria no crece con la hoja
+    def __init__(self, titulo: str):
+        self.title = titulo
+        self._temporal = tempfile.TemporaryFile()
+        self._filas: list[str] = []
+
+    def append(self, fila: Iterable):
+        self._filas.append("<row>" + "".join(map(_celda_xlsx, fila)) + "</row>")
+        if len(self._filas) >= 4096:
+            self._volcar()
+
+    def _volcar(self):
+        self._temporal.write("".join(self._filas).encode("utf-8"))
+        self._filas.clear()
+
+    def escribir(self, destino):
+        self._volcar()
+        self._temporal.seek(0)
+        destino.write(_XLSX_HOJA_INICIO.encode("utf-8"))
+        shutil.copyfileobj(self._temporal, destino)
+        destino.write(_XLSX_HOJA_FIN.encode("utf-8"))
+        self._temporal.close()
+
+
+class LibroXlsx:
+    # misma interfaz que usan los visitors de openpyxl.Workbook(write_only=True)
+    def __init__(self):
+        self.worksheets: list[_HojaXlsx] = []
+
+    def create_sheet(self, titulo: str) -> _HojaXlsx:
+        hoja = _HojaXlsx(titulo)
+        self.worksheets.append(hoja)
+        return hoja
+
+    def save(self, filename: str):
+        indices = range(1, len(self.worksheets) + 1)
+        with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("[Content_Types].xml", _XLSX_TIPOS.format(hojas="".join(_XLSX_TIPO_HOJA.format(i=i)
+                                                                               for i in indices)))
+            z.writestr("_rels/.rels", _XLSX_RELS)
+            z.writestr("xl/workbook.xml", _XLSX_LIBRO.format(hojas="".join(
+                f'<sheet name={quoteattr(h.title)} sheetId="{i}" r:id="rId{i}"/>'
+                for i, h in zip(indices, self.worksheets))))
+            z.writestr("xl/_rels/workbook.xml.rels", _XLSX_LIBRO_RELS.format(hojas="".join(
+                _XLSX_REL_HOJA.format(i=i) for i in indices)))
+            for i, hoja in zip(indices, self.worksheets):
+                with z.open(f"xl/worksheets/sheet{i}.xml", "w") as destino:
+                    hoja.escribir(destino)
+
+
 class ExcelExportVisitor(ExportVisitor):
     def __init__(self, filename="export.xlsx"):
         if not filename.endswith('.xlsx'):
@@ -176,36 +834,143 @@ class ExcelExportVisitor(ExportVisitor):
         self.filename = filename
         self.ninjas_data: list[dict] = []
         self.misiones_data: list[dict] = []
+        self.resumen_data: list[dict] = []
 
     def visit_ninja(self, ninja: Ninja):
-        self.ninjas_data.append({
-            "Nombre": ninja.nombre,
-            "Rango": ninja.rango.value,
-            "Aldea": ninja.aldea.nombre if ninja.aldea else None,
-            "Ataque": ninja.estadisticas.ataque,
-            "Defensa": ninja.estadisticas.defensa,
-            "Chakra": ninja.estadisticas.chakra,
-            "Jutsus": ", ".join([j.nombre for j in ninja.jutsus])
-        })
+        self.ninjas_data.append(dict(zip(COLUMNAS_NINJAS, _fila_ninja(ninja))))
 
     def visit_mision(self, mision: Mision):
-        self.misiones_data.append({
-            "Rango": mision.rango.value,
-            "Recompensa": mision.recompensa,
-            "Rango Requerido": mision.rango_requerido.value
-        })
+        self.misiones_data.append(dict(zip(COLUMNAS_MISIONES, _fila_mision(mision))))
+
+    def agregar_resumen(self, filas: list[list]):
+        self.resumen_data.extend(dict(zip(COLUMNAS_RESUMEN, f)) for f in filas)
 
     def save(self):
+        try:
+            import openpyxl  # noqa: F401 (motor de pd.ExcelWriter)
+            import pandas as pd
+        except ImportError:
+            return self._save_sin_pandas()
         with pd.ExcelWriter(self.filename, engine="openpyxl") as writer:
             if self.ninjas_data:
                 pd.DataFrame(self.ninjas_data).to_excel(writer, sheet_name="Ninjas", index=False)
             if self.misiones_data:
                 pd.DataFrame(self.misiones_data).to_excel(writer, sheet_name="Misiones", index=False)
+            if self.resumen_data:
+                pd.DataFrame(self.resumen_data).to_excel(writer, sheet_name="Resumen", index=False)
         return f"Datos exportados a {self.filename}"
 
+    def _save_sin_pandas(self):
+        libro = LibroXlsx()
+        for nombre, columnas, datos in (("Ninjas", COLUMNAS_NINJAS, self.ninjas_data),
+                                        ("Misiones", COLUMNAS_MISIONES, self.misiones_data),
+                                        ("Resumen", COLUMNAS_RESUMEN, self.resumen_data)):
+            if datos or (nombre == "Ninjas" and not self.misiones_data):
+                hoja = libro.create_sheet(nombre)
+                hoja.append(columnas)
+                for fila in datos:
+                    hoja.append(fila.values())
+        libro.save(self.filename)
+        return f"Datos exportados a {self.filename}"
+
+
+class _HojaStream:
+    # hoja de solo escritura que se parte en Nombre_2, Nombre_3... al llegar al limite de excel
+    def __init__(self, libro, nombre: str, encabezados: list[str]):
+        self.libro = libro
+        self.nombre = nombre
+        self.encabezados = encabezados
+        self.hojas = 0
+        self.total = 0
+        self._hoja = None
+        self._filas = 0
+
+    def append(self, fila: list):
+        if self._hoja is None or self._filas >= EXCEL_MAX_FILAS:
+            self.hojas += 1
+            titulo = self.nombre if self.hojas == 1 else f"{self.nombre}_{self.hojas}"
+            self._hoja = self.libro.create_sheet(titulo)
+            self._hoja.append(self.encabezados)
+            self._filas = 1
+        self._hoja.append(fila)
+        self._filas += 1
+        self.total += 1
+
+
+class ExcelStreamExportVisitor(ExportVisitor):
+    # va agregando filas a medida que visita, sin DataFrames ni libro completo en memoria
+    def __init__(self, filename="export.xlsx"):
+        if not filename.endswith('.xlsx'):
+            filename += '.xlsx'
+        self.filename = filename
+        try:
+            import openpyxl
+            self.libro = openpyxl.Workbook(write_only=True)
+        except ImportError:
+            self.libro = LibroXlsx()
+        self.ninjas = _HojaStream(self.libro, "Ninjas", COLUMNAS_NINJAS)
+        self.misiones = _HojaStream(self.libro, "Misiones", COLUMNAS_MISIONES)
+        self.segundos = 0.0
+        self._inicio = time.perf_counter()
+
+    @property
+    def filas(self) -> int:
+        return self.ninjas.total + self.misiones.total
+
+    def visit_ninja(self, ninja: Ninja):
+        self.ninjas.append(_fila_ninja(ninja))
+
+    def visit_mision(self, mision: Mision):
+        self.misiones.append(_fila_mision(mision))
+
+    def agregar_resumen(self, filas: list[list]):
+        hoja = _HojaStream(self.libro, "Resumen", COLUMNAS_RESUMEN)
+        for fila in filas:
+            hoja.append(fila)
+
+    def save(self):
+        if not self.libro.worksheets:
+            # un libro sin hojas no se puede guardar
+            self.libro.create_sheet("Ninjas").append(COLUMNAS_NINJAS)
+        self.libro.save(self.filename)
+        self.segundos = time.perf_counter() - self._inicio
+        velocidad = self.filas / self.segundos if self.segundos else 0
+        return f"Datos exportados a {self.filename} ({self.filas} filas, {velocidad:,.0f} filas/s)"
+
 
 #bider y factory
 
+def _estampar(plantilla: Ninja, nombres: Iterable[str]) -> list[Ninja]:
+    # copias de la plantilla sin pasar por __init__: cada ninja lleva su propio Estadisticas
+    # (entrenar lo modifica) y su propia lista, pero los Jutsu son los mismos objetos.
+    # el gc se apaga mientras tanto, si no revisa millones de objetos recien creados que no son basura
+    rango, est, jutsus = plantilla.rango, plantilla.estadisticas, plantilla.jutsus
+    ataque, defensa, chakra = est.ataque, est.defensa, est.chakra
+    nuevo_ninja, nuevo_est = Ninja.__new__, Estadisticas.__new__
+    ninjas = []
+    agregar = ninjas.append
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for nombre in nombres:
+            e = nuevo_est(Estadisticas)
+            e.ataque = ataque
+            e.defensa = defensa
+            e.chakra = chakra
+            e.version = 0
+            ninja = nuevo_ninja(Ninja)
+            ninja.nombre = nombre
+            ninja.rango = rango
+            ninja.estadisticas = e
+            ninja.jutsus = jutsus[:]
+            ninja.aldea = None
+            agregar(ninja)
+    finally:
+        if gc_activo:
+            gc.enable()
+    return ninjas
+
+
 class NinjaBuilder:
     def __init__(self):
         self.nombre = None
@@ -235,72 +1000,268 @@ class NinjaBuilder:
             ninja.jutsus.append(j)
         return ninja
 
+    def build_lote(self, nombres: Iterable[str] | int) -> list[Ninja]:
+        # la configuracion actual es la plantilla; con un numero los nombres son nombre-0, nombre-1, ...
+        # y sin with_nombre se usa "ninja" de base
+        if isinstance(nombres, int):
+            base = self.nombre or "ninja"
+            nombres = [f"{base}-{i}" for i in range(nombres)]
+        return _estampar(self.build(), nombres)
+
 
 class NinjaFactory(ABC):
     @abstractmethod
     def crear_ninja(self, nombre: str) -> Ninja:
         pass
 
+    def crear_ninjas(self, nombres: Iterable[str]) -> list[Ninja]:
+        # una sola llamada a crear_ninja hace de plantilla para todo el lote
+        return _estampar(self.crear_ninja(""), nombres)
+
+    def crear_roster(self, nombres: list[str], aldea: Aldea | None = None,
+                     roster: "Roster | None" = None) -> "Roster":
+        # lo mismo pero en columnas: sin objetos por ninja, solo un extend de los arreglos
+        plantilla = self.crear_ninja("")
+        est = plantilla.estadisticas
+        if roster is None:
+            roster = Roster(len(nombres))
+        roster.extend(nombres, plantilla.rango, est.ataque, est.defensa, est.chakra, aldea, plantilla.jutsus)
+        return roster
+
 
 class HojaFactory(NinjaFactory):
     def crear_ninja(self, nombre: str) -> Ninja:
         ninja = Ninja(nombre, RangoNinja.GENIN, Estadisticas(50, 40, 100))
-        ninja.jutsus.append(Jutsu("Katon: Goukakyuu no Jutsu", 20, "Bola de fuego"))
+        ninja.jutsus.append(Jutsu.compartido("Katon: Goukakyuu no Jutsu", 20, "Bola de fuego"))
         return ninja
 
 
 class ArenaFactory(NinjaFactory):
     def crear_ninja(self, nombre: str) -> Ninja:
         ninja = Ninja(nombre, RangoNinja.CHUNIN, Estadisticas(60, 50, 120))
-        ninja.jutsus.append(Jutsu("Sabaku Kyuu", 25, "Defensa y constricción de arena"))
+        ninja.jutsus.append(Jutsu.compartido("Sabaku Kyuu", 25, "Defensa y constricción de arena"))
         return ninja
 
 
 class NieblaFactory(NinjaFactory):
     def crear_ninja(self, nombre: str) -> Ninja:
         ninja = Ninja(nombre, RangoNinja.GENIN, Estadisticas(55, 45, 90))
-        ninja.jutsus.append(Jutsu("Suiton: Muro de Agua", 20, "Defensa acuática"))
+        ninja.jutsus.append(Jutsu.compartido("Suiton: Muro de Agua", 20, "Defensa acuática"))
         return ninja
 
 
 class RocaFactory(NinjaFactory):
     def crear_ninja(self, nombre: str) -> Ninja:
         ninja = Ninja(nombre, RangoNinja.CHUNIN, Estadisticas(65, 60, 80))
-        ninja.jutsus.append(Jutsu("Doton: Puño de Roca", 25, "Incremento de defensa y ataque"))
+        ninja.jutsus.append(Jutsu.compartido("Doton: Puño de Roca", 25, "Incremento de defensa y ataque"))
         return ninja
 
 
 class NubeFactory(NinjaFactory):
     def crear_ninja(self, nombre: str) -> Ninja:
         ninja = Ninja(nombre, RangoNinja.JONIN, Estadisticas(70, 55, 110))
-        ninja.jutsus.append(Jutsu("Raiton: Lanza Relámpago", 30, "Ataque eléctrico rápido"))
+        ninja.jutsus.append(Jutsu.compartido("Raiton: Lanza Relámpago", 30, "Ataque eléctrico rápido"))
         return ninja
 
 
 class SonidoFactory(NinjaFactory):
     def crear_ninja(self, nombre: str) -> Ninja:
         ninja = Ninja(nombre, RangoNinja.GENIN, Estadisticas(45, 40, 95))
-        ninja.jutsus.append(Jutsu("Oto: Ondas Sonoras", 15, "Desorienta al enemigo"))
+        ninja.jutsus.append(Jutsu.compartido("Oto: Ondas Sonoras", 15, "Desorienta al enemigo"))
         return ninja
 
 
 class LluviaFactory(NinjaFactory):
     def crear_ninja(self, nombre: str) -> Ninja:
         ninja = Ninja(nombre, RangoNinja.CHUNIN, Estadisticas(60, 50, 100))
-        ninja.jutsus.append(Jutsu("Suiton: Lluvia Ácida", 25, "Daño progresivo"))
+        ninja.jutsus.append(Jutsu.compartido("Suiton: Lluvia Ácida", 25, "Daño progresivo"))
         return ninja
 
 
+FABRICAS: dict[str, NinjaFactory] = {
+    "hoja": HojaFactory(),
+    "arena": ArenaFactory(),
+    "niebla": NieblaFactory(),
+    "roca": RocaFactory(),
+    "nube": NubeFactory(),
+    "sonido": SonidoFactory(),
+    "lluvia": LluviaFactory(),
+}
+
+
+class GeneradorNombres:
+    # nombres reproducibles para mundos de prueba: misma semilla, mismos nombres.
+    # el numero del final los hace unicos, el registro indexa por nombre
+    SILABAS = ("na", "ru", "to", "sa", "su", "ke", "ka", "shi", "hi", "ta", "ma", "ri", "ko", "no", "ji", "ra",
+               "ya", "te", "mi", "ze", "ga", "do", "ne", "zu")
+    CLANES = ("Uzumaki", "Uchiha", "Hyuga", "Nara", "Akimichi", "Yamanaka", "Aburame", "Inuzuka", "Sarutobi",
+              "Senju", "Hatake", "Hozuki", "Sabaku", "Momochi")
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+        self._pila = [(a + b + c).capitalize() for a in self.SILABAS for b in self.SILABAS for c in self.SILABAS]
+        self._contador = 0
+
+    def nombres(self, n: int) -> list[str]:
+        pila = self._rng.integers(0, len(self._pila), n).tolist()
+        clan = self._rng.integers(0, len(self.CLANES), n).tolist()
+        ini = self._contador
+        self._contador += n
+        p, c = self._pila, self.CLANES
+        return [f"{p[i]} {c[j]} {k}" for k, i, j in zip(range(ini, ini + n), pila, clan)]
+
+
+def poblar_aldea(aldea: Aldea, mezcla: dict[str, int],
+                 nombres: GeneradorNombres | Iterable[str] | None = None) -> list[Ninja]:
+    # mezcla: {"hoja": 1000, "arena": 500} -> cuantos ninjas de cada fabrica de FABRICAS
+    desconocidas = [origen for origen in mezcla if origen not in FABRICAS]
+    if desconocidas:
+        raise ValueError(f"aldea de origen no válida: {', '.join(desconocidas)}")
+    if nombres is None:
+        nombres = GeneradorNombres()
+    if not isinstance(nombres, GeneradorNombres):
+        nombres = iter(nombres)
+    ninjas = []
+    for origen, cantidad in mezcla.items():
+        lote = nombres.nombres(cantidad) if isinstance(nombres, GeneradorNombres) else list(islice(nombres, cantidad))
+        if len(lote) < cantidad:
+            raise ValueError(f"faltan nombres para {cantidad} ninjas de {origen}")
+        ninjas.extend(FABRICAS[origen].crear_ninjas(lote))
+    aldea.add_ninjas(ninjas)
+    return ninjas
+
+
+# escritores en streaming: cada registro se escribe apenas se visita,
+# asi la memoria no crece con el tamaño del roster
+
+def _json_registro(registro: dict) -> str:
+    # mismo formato que json.dumps(data, indent=2) con el registro anidado dos niveles
+    return json.dumps(registro, indent=2, ensure_ascii=False).replace("\n", "\n    ")
+
+
+class JsonStreamWriter:
+    def __init__(self, f):
+        self.f = f
+        self.serializar = _json_registro
+        self.registros = 0
+        self._primera_seccion = True
+        self._primer_registro = True
+
+    def abrir(self):
+        self.f.write("{")
+
+    def abrir_seccion(self, nombre: str):
+        separador = "\n  " if self._primera_seccion else ",\n  "
+        self.f.write(f"{separador}{json.dumps(nombre)}: [")
+        self._primera_seccion = False
+        self._primer_registro = True
+
+    def escribir(self, registro: dict):
+        self.escribir_renderizado(self.serializar(registro))
+
+    def escribir_renderizado(self, texto: str):
+        self.f.write(("\n    " if self._primer_registro else ",\n    ") + texto)
+        self._primer_registro = False
+        self.registros += 1
+
+    def escribir_varios(self, textos: list[str]):
+        if textos:
+            self.escribir_renderizado(",\n    ".join(textos))
+            self.registros += len(textos) - 1
+
+    def cerrar_seccion(self):
+        self.f.write("]" if self._primer_registro else "\n  ]")
+
+    def cerrar(self):
+        self.f.write("}" if self._primera_seccion else "\n}")
+
+
+def escribir_json(ninjas: Iterable[Ninja], misiones: Iterable[Mision], f) -> int:
+    visitor = metricas.instrumentar(JsonExportVisitor(), "exportar_json")
+    writer = JsonStreamWriter(f)
+    writer.serializar = metricas.envolver(writer.serializar, "exportar_json.serializar")
+    writer.abrir()
+    for seccion, elementos in (("ninjas", ninjas), ("misiones", misiones)):
+        writer.abrir_seccion(seccion)
+        for e in elementos:
+            writer.escribir(e.accept(visitor))
+        writer.cerrar_seccion()
+    writer.cerrar()
+    return writer.registros
+
+
+def escribir_ndjson(ninjas: Iterable[Ninja], misiones: Iterable[Mision], f, flush: bool = False) -> int:
+    # un registro por linea con su tipo, para consumirlo mientras se escribe
+    visitor = metricas.instrumentar(JsonExportVisitor(), "exportar_ndjson")
+    dumps = metricas.envolver(json.dumps, "exportar_ndjson.serializar")
+    total = 0
+    for tipo, elementos in (("ninja", ninjas), ("mision", misiones)):
+        for e in elementos:
+            f.write(dumps({"tipo": tipo, **e.accept(visitor)}, ensure_ascii=False, separators=(",", ":")) + "\n")
+            if flush:
+                f.flush()
+            total += 1
+    return total
+
+
+
+class XmlStreamWriter:
+    # junta los elementos en bloques de ~tam_bloque caracteres antes de escribirlos
+    def __init__(self, f, tam_bloque: int = 1 << 16):
+        self.f = f
+        self.tam_bloque = tam_bloque
+        self.registros = 0
+        self._partes: list[str] = []
+        self._tam = 0
+
+    def escribir_crudo(self, texto: str):
+        self._partes.append(texto)
+        self._tam += len(texto)
+        if self._tam >= self.tam_bloque:
+            self.flush()
+
+    def escribir_elemento(self, texto: str):
+        self.escribir_crudo(texto)
+        self.registros += 1
+
+    def abrir(self):
+        self.escribir_crudo("<dataset>")
+
+    def abrir_seccion(self, nombre: str):
+        self.escribir_crudo(f"<{nombre}>")
+
+    def cerrar_seccion(self, nombre: str):
+        self.escribir_crudo(f"</{nombre}>")
+
+    def cerrar(self):
+        self.escribir_crudo("</dataset>")
+        self.flush()
+
+    def flush(self):
+        if self._partes:
+            self.f.write("".join(self._partes))
+            self._partes.clear()
+            self._tam = 0
+
+
+def escribir_xml(ninjas: Iterable[Ninja], misiones: Iterable[Mision], f) -> int:
+    visitor = metricas.instrumentar(XmlExportVisitor(), "exportar_xml")
+    writer = XmlStreamWriter(f)
+    writer.abrir()
+    for seccion, elementos in (("ninjas", ninjas), ("misiones", misiones)):
+        writer.abrir_seccion(seccion)
+        for e in elementos:
+            writer.escribir_elemento(e.accept(visitor))
+        writer.cerrar_seccion(seccion)
+    writer.cerrar()
+    return writer.registros
+
+
 # lo que hace que esta vaina deje descargar -> lo que visitor forma 
 
+@metricas.medir_exportacion
 def exportar_json(ninjas: list[Ninja], misiones: list[Mision], filename: str | None = None) -> str:
-    visitor = JsonExportVisitor()
-    data = {
-        "ninjas": [n.accept(visitor) for n in ninjas],
-        "misiones": [m.accept(visitor) for m in misiones]
-    }
-    texto = json.dumps(data, indent=2, ensure_ascii=False)
-    
     if filename:
         # Añadir extensión .json si no la tiene
         if not filename.endswith('.json'):
@@ -309,18 +1270,38 @@ def exportar_json(ninjas: list[Ninja], misiones: list[Mision], filename: str | N
         # Obtener la ruta absoluta
         full_path = os.path.abspath(filename)
         
+        # con archivo se escribe en streaming, registro por registro
         with open(full_path, "w", encoding="utf-8") as f:
-            f.write(texto)
+            escribir_json(ninjas, misiones, metricas.archivo(f, "exportar_json"))
         return f"Datos JSON exportados a: {full_path}"
-    return texto
 
+    visitor = metricas.instrumentar(JsonExportVisitor(), "exportar_json")
+    data = {
+        "ninjas": [n.accept(visitor) for n in ninjas],
+        "misiones": [m.accept(visitor) for m in misiones]
+    }
+    return metricas.envolver(json.dumps, "exportar_json.serializar")(data, indent=2, ensure_ascii=False)
+
+
+@metricas.medir_exportacion
+def exportar_ndjson(ninjas: Iterable[Ninja], misiones: Iterable[Mision], filename: str | None = None,
+                    flush: bool = False) -> str:
+    if filename:
+        if not filename.endswith('.ndjson'):
+            filename += '.ndjson'
+        full_path = os.path.abspath(filename)
+        # con flush cada linea llega al archivo apenas se escribe, para quien lo lee mientras tanto (tail -f)
+        with open(full_path, "w", encoding="utf-8") as f:
+            escribir_ndjson(ninjas, misiones, metricas.archivo(f, "exportar_ndjson"), flush=flush)
+        return f"Datos NDJSON exportados a: {full_path}"
+
+    buffer = io.StringIO()
+    escribir_ndjson(ninjas, misiones, buffer)
+    return buffer.getvalue()
 
+
+@metricas.medir_exportacion
 def exportar_xml(ninjas: list[Ninja], misiones: list[Mision], filename: str | None = None) -> str:
-    visitor = XmlExportVisitor()
-    ninjas_xml = "".join([n.accept(visitor) for n in ninjas])
-    misiones_xml = "".join([m.accept(visitor) for m in misiones])
-    texto = f"<dataset><ninjas>{ninjas_xml}</ninjas><misiones>{misiones_xml}</misiones></dataset>"
-    
     if filename:
         # Añadir extensión .xml si no la tiene
         if not filename.endswith('.xml'):
@@ -329,14 +1310,18 @@ def exportar_xml(ninjas: list[Ninja], misiones: list[Mision], filename: str | No
         # Obtener la ruta absoluta
         full_path = os.path.abspath(filename)
         
-        with open(full_path, "w", encoding="utf-8") as f:
-            f.write(texto)
+        with open(full_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            escribir_xml(ninjas, misiones, metricas.archivo(f, "exportar_xml"))
         return f"Datos XML exportados a: {full_path}"
-    return texto
+
+    buffer = io.StringIO()
+    escribir_xml(ninjas, misiones, buffer)
+    return buffer.getvalue()
 
 
+@metricas.medir_exportacion
 def exportar_texto(ninjas: list[Ninja], misiones: list[Mision], filename: str | None = None) -> str:
-    visitor = TextExportVisitor()
+    visitor = metricas.instrumentar(TextExportVisitor(), "exportar_texto")
     partes = []
     if ninjas:
         partes.append("=== NINJAS ===\n")
@@ -344,7 +1329,8 @@ def exportar_texto(ninjas: list[Ninja], misiones: list[Mision], filename: str |
     if misiones:
         partes.append("=== MISIONES ===\n")
         partes.extend([m.accept(visitor) for m in misiones])
-    texto = "\n".join(partes) if partes else "Sin datos para exportar."
+    unir = metricas.envolver("\n".join, "exportar_texto.serializar")
+    texto = unir(partes) if partes else "Sin datos para exportar."
     
     if filename:
         # Añadir extensión .txt si no la tiene
@@ -355,12 +1341,14 @@ def exportar_texto(ninjas: list[Ninja], misiones: list[Mision], filename: str |
         full_path = os.path.abspath(filename)
         
         with open(full_path, "w", encoding="utf-8") as f:
-            f.write(texto)
+            metricas.archivo(f, "exportar_texto").write(texto)
         return f"Datos de texto exportados a: {full_path}"
     return texto
 
 
-def exportar_excel(ninjas: list[Ninja], misiones: list[Mision], filename: str = "export.xlsx") -> str:
+@metricas.medir_exportacion
+def exportar_excel(ninjas: Iterable[Ninja], misiones: Iterable[Mision], filename: str = "export.xlsx",
+                   streaming: bool = True, analitica: "Analitica | None" = None) -> str:
     # Añadir extensión .xlsx si no la tiene
     if not filename.endswith('.xlsx'):
         filename += '.xlsx'
@@ -368,16 +1356,2228 @@ def exportar_excel(ninjas: list[Ninja], misiones: list[Mision], filename: str =
     # Obtener la ruta absoluta
     full_path = os.path.abspath(filename)
     
-    exporter = ExcelExportVisitor(filename)
+    exporter = ExcelStreamExportVisitor(filename) if streaming else ExcelExportVisitor(filename)
+    metricas.instrumentar(exporter, "exportar_excel")
     for n in ninjas:
         n.accept(exporter)
     for m in misiones:
         m.accept(exporter)
+    if analitica is not None:
+        # hoja Resumen con los agregados ya calculados, no se recorre nada de nuevo
+        exporter.agregar_resumen(analitica.filas_resumen())
     
-    result = exporter.save()
+    result = metricas.envolver(exporter.save, "exportar_excel.escribir")()
     return f"{result}\n📍 Ruta completa: {full_path}"
 
 
+# exportacion en paralelo: se recorren los datos una sola vez, cada bloque se renderiza
+# en un proceso con los visitors de siempre y los pedazos se cosen en orden en cada archivo
+
+FORMATOS_EXPORTACION = ("texto", "json", "xml", "excel")
+
+
+def _desacoplar(elementos: list, aldeas: dict) -> list:
+    # copia liviana para mandar a otro proceso: la aldea va sin su lista de ninjas,
+    # si no pickle arrastraria la aldea entera con cada bloque
+    copias = []
+    for e in elementos:
+        if isinstance(e, Mision):
+            copias.append(e)
+            continue
+        copia = Ninja.__new__(Ninja)
+        copia.nombre = e.nombre
+        copia.rango = e.rango
+        est = e.estadisticas
+        copia.estadisticas = Estadisticas(est.ataque, est.defensa, est.chakra)
+        copia.jutsus = list(e.jutsus)
+        copia.aldea = None
+        if e.aldea is not None:
+            copia.aldea = aldeas.get(id(e.aldea))
+            if copia.aldea is None:
+                copia.aldea = aldeas[id(e.aldea)] = Aldea.__new__(Aldea)
+                copia.aldea.nombre = e.aldea.nombre
+                copia.aldea.ninjas = []
+        copias.append(copia)
+    return copias
+
+
+def _renderizar_bloque(tarea: tuple[list, tuple[str, ...]]) -> dict:
+    elementos, formatos = tarea
+    salida = {"n": len(elementos)}
+    if "texto" in formatos:
+        visitor = TextExportVisitor()
+        salida["texto"] = [e.accept(visitor) for e in elementos]
+    if "json" in formatos:
+        visitor = JsonExportVisitor()
+        salida["json"] = [_json_registro(e.accept(visitor)) for e in elementos]
+    if "xml" in formatos:
+        visitor = XmlExportVisitor()
+        salida["xml"] = ["".join([e.accept(visitor) for e in elementos])]
+    if "excel" in formatos:
+        visitor = ExcelExportVisitor()
+        for e in elementos:
+            e.accept(visitor)
+        salida["excel"] = [list(fila.values()) for fila in visitor.ninjas_data + visitor.misiones_data]
+    return salida
+
+
+def _bloques(elementos: Iterable, tam_bloque: int):
+    iterador = iter(elementos)
+    while True:
+        bloque = list(islice(iterador, tam_bloque))
+        if not bloque:
+            return
+        yield bloque
+
+
+def _en_orden(pool, tareas, ventana: int):
+    # como map pero con a lo sumo `ventana` bloques en vuelo, para que la memoria no crezca
+    if pool is None:
+        yield from map(_renderizar_bloque, tareas)
+        return
+    pendientes = deque()
+    for tarea in tareas:
+        pendientes.append(pool.submit(_renderizar_bloque, tarea))
+        if len(pendientes) >= ventana:
+            yield pendientes.popleft().result()
+    while pendientes:
+        yield pendientes.popleft().result()
+
+
+class _TextoStreamWriter:
+    # reproduce exportar_texto: titulo de seccion solo si tiene elementos, todo unido por "\n"
+    def __init__(self, f):
+        self.f = f
+        self._vacio = True
+
+    def escribir(self, parte: str):
+        self.f.write(parte if self._vacio else "\n" + parte)
+        self._vacio = False
+
+    def cerrar(self):
+        if self._vacio:
+            self.f.write("Sin datos para exportar.")
+
+
+@metricas.medir_exportacion
+def exportar_todo(ninjas: Iterable[Ninja], misiones: Iterable[Mision], base: str = "export",
+                  formatos: Iterable[str] = FORMATOS_EXPORTACION, workers: int | None = None,
+                  tam_bloque: int = 5_000) -> str:
+    formatos = tuple(f for f in FORMATOS_EXPORTACION if f in set(formatos))
+    workers = workers or os.cpu_count() or 1
+    extensiones = {"texto": ".txt", "json": ".json", "xml": ".xml", "excel": ".xlsx"}
+    rutas = {f: os.path.abspath(base + extensiones[f]) for f in formatos}
+    inicio = time.perf_counter()
+
+    archivos = {f: open(rutas[f], "w", encoding="utf-8", buffering=1 << 20) for f in formatos if f != "excel"}
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        texto = _TextoStreamWriter(archivos["texto"]) if "texto" in archivos else None
+        json_w = JsonStreamWriter(archivos["json"]) if "json" in archivos else None
+        xml_w = XmlStreamWriter(archivos["xml"]) if "xml" in archivos else None
+        excel = ExcelStreamExportVisitor(rutas["excel"]) if "excel" in formatos else None
+        if json_w:
+            json_w.abrir()
+        if xml_w:
+            xml_w.abrir()
+
+        registros = 0
+        aldeas: dict[int, Aldea] = {}
+        for seccion, titulo, elementos in (("ninjas", "=== NINJAS ===\n", ninjas),
+                                           ("misiones", "=== MISIONES ===\n", misiones)):
+            if json_w:
+                json_w.abrir_seccion(seccion)
+            if xml_w:
+                xml_w.abrir_seccion(seccion)
+            hoja = (excel.ninjas if seccion == "ninjas" else excel.misiones) if excel else None
+            tareas = ((_desacoplar(bloque, aldeas), formatos) for bloque in _bloques(elementos, tam_bloque))
+            primero = True
+            for salida in _en_orden(pool, tareas, 2 * workers):
+                if texto:
+                    if primero:
+                        texto.escribir(titulo)
+                    for parte in salida["texto"]:
+                        texto.escribir(parte)
+                if json_w:
+                    for registro in salida["json"]:
+                        json_w.escribir_renderizado(registro)
+                if xml_w:
+                    xml_w.escribir_crudo(salida["xml"][0])
+                if excel:
+                    for fila in salida["excel"]:
+                        hoja.append(fila)
+                registros += salida["n"]
+                primero = False
+            if json_w:
+                json_w.cerrar_seccion()
+            if xml_w:
+                xml_w.cerrar_seccion(seccion)
+
+        if texto:
+            texto.cerrar()
+        if json_w:
+            json_w.cerrar()
+        if xml_w:
+            xml_w.cerrar()
+        if excel:
+            excel.save()
+    finally:
+        if pool:
+            pool.shutdown()
+        for f in archivos.values():
+            f.close()
+
+    segundos = time.perf_counter() - inicio
+    lineas = [f"{registros} registros exportados en {segundos:.2f} s con {workers} procesos "
+              f"({registros / segundos:,.0f} registros/s):"]
+    lineas += [f"  {f}: {rutas[f]}" for f in formatos]
+    return "\n".join(lineas)
+
+
+
+# re-exportacion incremental: cada registro guarda su fragmento ya serializado y los
+# observadores marcan como sucios los que cambian, asi solo se re-renderizan esos
+
+class _SeccionIncremental:
+    __slots__ = ("fuente", "largo", "fragmentos", "posiciones")
+
+    def __init__(self, fuente: list):
+        self.fuente = fuente
+        self.largo = 0
+        self.fragmentos: list[str] = []
+        self.posiciones: dict[int, list[int]] = {}
+
+
+class ExportIncremental(Observador):
+    # la ruta rapida supone que las listas solo crecen al final (como en main); si se pasa
+    # otra lista se recorre entera, pero igual se reutilizan los fragmentos guardados
+    VISITORS = {"json": JsonExportVisitor, "xml": XmlExportVisitor, "texto": TextExportVisitor}
+    EXTENSIONES = {"json": ".json", "xml": ".xml", "texto": ".txt"}
+
+    def __init__(self, formato: str = "json"):
+        if formato not in self.VISITORS:
+            raise ValueError(f"formato no soportado: {formato}")
+        self.formato = formato
+        self._visitor = self.VISITORS[formato]()
+        self._fragmentos: dict[int, str] = {}
+        # mantiene vivos los objetos para que su id no se reutilice; lo que sale de las listas
+        # exportadas se poda en exportar()
+        self._objetos: dict[int, Ninja | Mision] = {}
+        self._por_estadisticas: dict[int, set[int]] = {}
+        self._sucios: set[int] = set()
+        self._secciones: dict[str, _SeccionIncremental] = {}
+        self.renderizados = 0
+        self._podar = False
+        suscribir(self)
+
+    def cerrar(self):
+        desuscribir(self)
+
+    def _marcar(self, oid: int):
+        if self._fragmentos.pop(oid, None) is not None:
+            self._sucios.add(oid)
+
+    def ninja_asignado(self, ninja: Ninja, aldea: Aldea):
+        self._marcar(id(ninja))
+
+    def jutsu_agregado(self, ninja: Ninja, jutsu: Jutsu):
+        self._marcar(id(ninja))
+
+    def entrenado(self, estadisticas: Estadisticas):
+        for oid in self._por_estadisticas.get(id(estadisticas), ()):
+            self._marcar(oid)
+
+    def _fragmento(self, obj: Ninja | Mision) -> str:
+        oid = id(obj)
+        fragmento = self._fragmentos.get(oid)
+        if fragmento is None:
+            registro = obj.accept(self._visitor)
+            fragmento = _json_registro(registro) if self.formato == "json" else registro
+            self._fragmentos[oid] = fragmento
+            self._objetos[oid] = obj
+            if isinstance(obj, Ninja):
+                self._por_estadisticas.setdefault(id(obj.estadisticas), set()).add(oid)
+            self.renderizados += 1
+        return fragmento
+
+    def _actualizar(self, nombre: str, fuente: Iterable) -> list[tuple[int, Ninja | Mision]]:
+        # devuelve (posicion, objeto) de lo que cambio respecto de la exportacion anterior
+        if not isinstance(fuente, list):
+            fuente = list(fuente)
+        seccion = self._secciones.get(nombre)
+        cambios = []
+        if seccion is not None and seccion.fuente is fuente and len(fuente) >= seccion.largo:
+            for oid in self._sucios:
+                for p in seccion.posiciones.get(oid, ()):
+                    seccion.fragmentos[p] = self._fragmento(fuente[p])
+                    cambios.append((p, fuente[p]))
+        else:
+            seccion = self._secciones[nombre] = _SeccionIncremental(fuente)
+            # lista nueva o que se achico: puede haber objetos que ya no se exportan
+            self._podar = True
+        for p in range(seccion.largo, len(fuente)):
+            obj = fuente[p]
+            seccion.fragmentos.append(self._fragmento(obj))
+            seccion.posiciones.setdefault(id(obj), []).append(p)
+            cambios.append((p, obj))
+        seccion.largo = len(fuente)
+        return cambios
+
+    def _podar_cache(self):
+        # con la ruta rapida las listas solo crecen, asi que solo hace falta al rearmar una seccion
+        vivos = set()
+        for seccion in self._secciones.values():
+            vivos.update(map(id, seccion.fuente))
+        for oid in [oid for oid in self._objetos if oid not in vivos]:
+            obj = self._objetos.pop(oid)
+            self._fragmentos.pop(oid, None)
+            if isinstance(obj, Ninja):
+                clave = id(obj.estadisticas)
+                oids = self._por_estadisticas.get(clave)
+                if oids is not None:
+                    oids.discard(oid)
+                    if not oids:
+                        del self._por_estadisticas[clave]
+        self._podar = False
+
+    def _escribir(self, f):
+        ninjas = self._secciones["ninjas"].fragmentos
+        misiones = self._secciones["misiones"].fragmentos
+        if self.formato == "json":
+            writer = JsonStreamWriter(f)
+            writer.abrir()
+            for nombre, fragmentos in (("ninjas", ninjas), ("misiones", misiones)):
+                writer.abrir_seccion(nombre)
+                writer.escribir_varios(fragmentos)
+                writer.cerrar_seccion()
+            writer.cerrar()
+        elif self.formato == "xml":
+            # por bloques como exportar_xml, sin armar el documento entero en memoria
+            writer = XmlStreamWriter(f)
+            writer.abrir()
+            for nombre, fragmentos in (("ninjas", ninjas), ("misiones", misiones)):
+                writer.abrir_seccion(nombre)
+                for fragmento in fragmentos:
+                    writer.escribir_elemento(fragmento)
+                writer.cerrar_seccion(nombre)
+            writer.cerrar()
+        else:
+            writer = _TextoStreamWriter(f)
+            for titulo, fragmentos in (("=== NINJAS ===\n", ninjas), ("=== MISIONES ===\n", misiones)):
+                if fragmentos:
+                    writer.escribir(titulo)
+                for fragmento in fragmentos:
+                    writer.escribir(fragmento)
+            writer.cerrar()
+
+    def exportar(self, ninjas: Iterable[Ninja], misiones: Iterable[Mision], filename: str | None = None,
+                 delta: str | None = None) -> str:
+        self.renderizados = 0
+        cambios = [("ninjas", p, o) for p, o in self._actualizar("ninjas", ninjas)]
+        cambios += [("misiones", p, o) for p, o in self._actualizar("misiones", misiones)]
+        self._sucios.clear()
+        if self._podar:
+            self._podar_cache()
+
+        if delta:
+            # parche ndjson: cada linea es un registro que cambio o se agrego, con su posicion
+            visitor = JsonExportVisitor()
+            with open(delta, "w", encoding="utf-8") as f:
+                for seccion, p, obj in cambios:
+                    f.write(json.dumps({"seccion": seccion, "indice": p, "registro": obj.accept(visitor)},
+                                       ensure_ascii=False, separators=(",", ":")) + "\n")
+
+        total = self._secciones["ninjas"].largo + self._secciones["misiones"].largo
+        if filename:
+            extension = self.EXTENSIONES[self.formato]
+            if not filename.endswith(extension):
+                filename += extension
+            full_path = os.path.abspath(filename)
+            with open(full_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+                self._escribir(f)
+            return f"Exportación incremental a {full_path}: {self.renderizados} de {total} registros renderizados"
+        if delta:
+            return f"Delta exportado a {os.path.abspath(delta)}: {len(cambios)} de {total} registros"
+        buffer = io.StringIO()
+        self._escribir(buffer)
+        return buffer.getvalue()
+
+
+
+# roster columnar: los datos de cada ninja viven en columnas numpy contiguas
+# y NinjaView es solo un (roster, fila) que lee y escribe sobre ellas
+
+RANGOS_NINJA = list(RangoNinja)  # orden de la jerarquia, de Genin a Sannin
+_NIVEL_RANGO = {r: i for i, r in enumerate(RANGOS_NINJA)}
+
+
+def _columna_estadistica(campo: str):
+    def leer(self):
+        return int(getattr(self._roster, campo)[self._i])
+
+    def escribir(self, valor):
+        getattr(self._roster, campo)[self._i] = valor
+
+    return property(leer, escribir)
+
+
+class EstadisticasView:
+    __slots__ = ("_roster", "_i")
+
+    def __init__(self, roster: "Roster", i: int):
+        self._roster = roster
+        self._i = i
+
+    ataque = _columna_estadistica("_ataque")
+    defensa = _columna_estadistica("_defensa")
+    chakra = _columna_estadistica("_chakra")
+
+    @property
+    def version(self) -> int:
+        # igual que Estadisticas.version, para que CacheCombates sirva tambien con vistas
+        return int(self._roster._version[self._i])
+
+    def entrenar(self, inc_ataque=0, inc_defensa=0, inc_chakra=0):
+        self.ataque += inc_ataque
+        self.defensa += inc_defensa
+        self.chakra += inc_chakra
+        self._roster._version[self._i] += 1
+
+
+class NinjaView:
+    __slots__ = ("_roster", "_i")
+
+    def __init__(self, roster: "Roster", i: int):
+        self._roster = roster
+        self._i = i
+
+    @property
+    def nombre(self) -> str:
+        return self._roster.nombre(self._i)
+
+    @property
+    def rango(self) -> RangoNinja:
+        return RANGOS_NINJA[self._roster._rango[self._i]]
+
+    @property
+    def aldea(self) -> Aldea | None:
+        idx = self._roster._aldea[self._i]
+        return self._roster.aldeas[idx] if idx >= 0 else None
+
+    @property
+    def estadisticas(self) -> EstadisticasView:
+        return EstadisticasView(self._roster, self._i)
+
+    @property
+    def jutsus(self) -> tuple[Jutsu, ...]:
+        return self._roster._conjuntos[self._roster._jutsus[self._i]]
+
+    # mismo comportamiento que un Ninja normal, los visitors no notan la diferencia
+    entrenar = Ninja.entrenar
+    pelear = Ninja.pelear
+    accept = Ninja.accept
+
+    def __eq__(self, otro):
+        return isinstance(otro, NinjaView) and otro._roster is self._roster and otro._i == self._i
+
+    def __hash__(self):
+        return hash((id(self._roster), self._i))
+
+    def __repr__(self):
+        return f"NinjaView({self.nombre!r}, {self.rango.value})"
+
+
+class Roster:
+    CAMPOS = ("ataque", "defensa", "chakra")
+
+    def __init__(self, capacidad: int = 1024):
+        capacidad = max(capacidad, 1)
+        self._n = 0
+        self._rango = np.zeros(capacidad, np.uint8)
+        self._aldea = np.full(capacidad, -1, np.int32)
+        self._ataque = np.zeros(capacidad, np.int32)
+        self._defensa = np.zeros(capacidad, np.int32)
+        self._chakra = np.zeros(capacidad, np.int32)
+        # sube con cada entrenamiento, como Estadisticas.version
+        self._version = np.zeros(capacidad, np.uint32)
+        self._jutsus = np.zeros(capacidad, np.int32)
+        # nombres en utf-8 uno detras de otro; el nombre i es _nombres[_offsets[i]:_offsets[i+1]]
+        self._nombres = bytearray()
+        self._offsets = np.zeros(capacidad + 1, np.int64)
+        self.aldeas: list[Aldea] = []
+        self._id_aldea: dict[Aldea, int] = {}
+        # cada ninja apunta a un conjunto de jutsus compartido, no a su propia lista
+        self._conjuntos: list[tuple[Jutsu, ...]] = [()]
+        self._id_conjunto: dict[tuple[int, ...], int] = {(): 0}
+
+    @classmethod
+    def desde_ninjas(cls, ninjas: Iterable[Ninja]) -> "Roster":
+        ninjas = list(ninjas)
+        roster = cls(len(ninjas))
+        for n in ninjas:
+            roster.add_ninja(n)
+        return roster
+
+    @classmethod
+    def desde_aldeas(cls, aldeas: Iterable[Aldea]) -> "Roster":
+        return cls.desde_ninjas(n for a in aldeas for n in a.ninjas)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i: int) -> NinjaView:
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("indice fuera del roster")
+        return NinjaView(self, i)
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield NinjaView(self, i)
+
+    def vistas(self, indices) -> list[NinjaView]:
+        return [NinjaView(self, int(i)) for i in indices]
+
+    # columnas (vistas sin copia de las filas ocupadas)
+
+    @property
+    def ataque(self):
+        return self._ataque[:self._n]
+
+    @property
+    def defensa(self):
+        return self._defensa[:self._n]
+
+    @property
+    def chakra(self):
+        return self._chakra[:self._n]
+
+    @property
+    def rango(self):
+        return self._rango[:self._n]
+
+    @property
+    def aldea_id(self):
+        return self._aldea[:self._n]
+
+    @property
+    def nbytes(self) -> int:
+        columnas = (self._rango, self._aldea, self._ataque, self._defensa, self._chakra, self._version, self._jutsus,
+                    self._offsets)
+        return sum(c.nbytes for c in columnas) + len(self._nombres)
+
+    def nombre(self, i: int) -> str:
+        return str(self._nombres[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+    def columna(self, campo: str):
+        if campo not in self.CAMPOS:
+            raise ValueError(f"campo desconocido: {campo}")
+        return getattr(self, campo)
+
+    def id_aldea(self, aldea: Aldea | None) -> int:
+        if aldea is None:
+            return -1
+        idx = self._id_aldea.get(aldea)
+        if idx is None:
+            idx = self._id_aldea[aldea] = len(self.aldeas)
+            self.aldeas.append(aldea)
+        return idx
+
+    def id_jutsus(self, jutsus: Iterable[Jutsu]) -> int:
+        conjunto = tuple(jutsus)
+        clave = tuple(id(j) for j in conjunto)
+        idx = self._id_conjunto.get(clave)
+        if idx is None:
+            idx = self._id_conjunto[clave] = len(self._conjuntos)
+            self._conjuntos.append(conjunto)
+        return idx
+
+    def _reservar(self, extra: int):
+        if not isinstance(self._nombres, bytearray):
+            # roster abierto desde un snapshot: los nombres se copian recien al primer cambio
+            self._nombres = bytearray(self._nombres)
+        necesario = self._n + extra
+        capacidad = len(self._ataque)
+        if necesario <= capacidad:
+            return
+        capacidad = max(capacidad, 1)
+        while capacidad < necesario:
+            capacidad *= 2
+        for attr in ("_rango", "_aldea", "_ataque", "_defensa", "_chakra", "_version", "_jutsus"):
+            viejo = getattr(self, attr)
+            nuevo = np.full(capacidad, -1 if attr == "_aldea" else 0, viejo.dtype)
+            nuevo[:self._n] = viejo[:self._n]
+            setattr(self, attr, nuevo)
+        offsets = np.zeros(capacidad + 1, np.int64)
+        offsets[:self._n + 1] = self._offsets[:self._n + 1]
+        self._offsets = offsets
+
+    def add(self, nombre: str, rango: RangoNinja, ataque: int, defensa: int, chakra: int,
+            aldea: Aldea | None = None, jutsus: Iterable[Jutsu] = ()) -> int:
+        self._reservar(1)
+        i = self._n
+        self._nombres += nombre.encode("utf-8")
+        self._offsets[i + 1] = len(self._nombres)
+        self._rango[i] = _NIVEL_RANGO[rango]
+        self._aldea[i] = self.id_aldea(aldea)
+        self._ataque[i] = ataque
+        self._defensa[i] = defensa
+        self._chakra[i] = chakra
+        self._version[i] = 0
+        self._jutsus[i] = self.id_jutsus(jutsus)
+        self._n += 1
+        return i
+
+    def add_ninja(self, ninja: Ninja) -> int:
+        est = ninja.estadisticas
+        return self.add(ninja.nombre, ninja.rango, est.ataque, est.defensa, est.chakra, ninja.aldea, ninja.jutsus)
+
+    def extend(self, nombres: list[str], rango, ataque, defensa, chakra,
+               aldea: Aldea | None = None, jutsus: Iterable[Jutsu] = ()) -> range:
+        # carga masiva: rango/ataque/defensa/chakra pueden ser escalares o arreglos del largo de nombres
+        cantidad = len(nombres)
+        self._reservar(cantidad)
+        ini, fin = self._n, self._n + cantidad
+        codificados = [n.encode("utf-8") for n in nombres]
+        largos = np.fromiter(map(len, codificados), np.int64, cantidad)
+        self._offsets[ini + 1:fin + 1] = len(self._nombres) + np.cumsum(largos)
+        self._nombres += b"".join(codificados)
+        if isinstance(rango, RangoNinja):
+            rango = _NIVEL_RANGO[rango]
+        self._rango[ini:fin] = rango
+        self._aldea[ini:fin] = self.id_aldea(aldea)
+        self._ataque[ini:fin] = ataque
+        self._defensa[ini:fin] = defensa
+        self._chakra[ini:fin] = chakra
+        self._version[ini:fin] = 0
+        self._jutsus[ini:fin] = self.id_jutsus(jutsus)
+        self._n = fin
+        return range(ini, fin)
+
+    # consultas vectorizadas, devuelven indices de filas
+
+    def filtrar(self, rango: RangoNinja | Iterable[RangoNinja] | None = None, aldea: Aldea | None = None,
+                min_ataque: int | None = None, min_defensa: int | None = None, min_chakra: int | None = None,
+                mascara=None):
+        m = np.ones(self._n, bool) if mascara is None else np.asarray(mascara, bool).copy()
+        if rango is not None:
+            if isinstance(rango, RangoNinja):
+                m &= self.rango == _NIVEL_RANGO[rango]
+            else:
+                m &= np.isin(self.rango, [_NIVEL_RANGO[r] for r in rango])
+        if aldea is not None:
+            m &= self.aldea_id == self._id_aldea.get(aldea, -2)
+        for columna, minimo in ((self.ataque, min_ataque), (self.defensa, min_defensa), (self.chakra, min_chakra)):
+            if minimo is not None:
+                m &= columna >= minimo
+        return np.flatnonzero(m)
+
+    def ordenar(self, campo: str, indices=None, descendente: bool = True):
+        valores = self.columna(campo)
+        if indices is None:
+            indices = np.arange(self._n)
+        else:
+            indices = np.asarray(indices)
+        claves = -valores[indices].astype(np.int64) if descendente else valores[indices]
+        return indices[np.argsort(claves, kind="stable")]
+
+    def top(self, campo: str, k: int, indices=None):
+        valores = self.columna(campo)
+        indices = np.arange(self._n) if indices is None else np.asarray(indices)
+        if k < len(indices):
+            indices = indices[np.argpartition(-valores[indices].astype(np.int64), k - 1)[:k]]
+        return self.ordenar(campo, indices)
+
+    def agregados(self, campo: str, por: str = "aldea") -> dict:
+        valores = self.columna(campo).astype(np.int64)
+        if por == "aldea":
+            grupos, etiquetas = self.aldea_id + 1, [None] + self.aldeas
+        elif por == "rango":
+            grupos, etiquetas = self.rango, RANGOS_NINJA
+        else:
+            raise ValueError("por debe ser 'aldea' o 'rango'")
+        conteo = np.bincount(grupos, minlength=len(etiquetas))
+        suma = np.bincount(grupos, weights=valores, minlength=len(etiquetas))
+        resultado = {}
+        for g, etiqueta in enumerate(etiquetas):
+            if conteo[g]:
+                resultado[etiqueta] = {"n": int(conteo[g]), "suma": int(suma[g]), "media": float(suma[g] / conteo[g])}
+        return resultado
+
+    def entrenar(self, indices=None, inc_ataque: int = 0, inc_defensa: int = 0, inc_chakra: int = 0,
+                 plan: "PlanEntrenamiento | None" = None) -> "ResumenEntrenamiento":
+        # entrenamiento masivo con sumas vectorizadas; indices repetidos entrenan una sola vez,
+        # por eso se sacan los repetidos antes y el resumen cuenta lo mismo que se sumo
+        sel = slice(0, self._n) if indices is None else np.unique(np.asarray(indices, np.int64))
+        rango = self._rango[sel]
+        if plan is None:
+            tabla = np.tile(np.array([inc_ataque, inc_defensa, inc_chakra], np.int32), (len(RANGOS_NINJA), 1))
+        else:
+            tabla = plan.tabla()
+        for k, columna in enumerate((self._ataque, self._defensa, self._chakra)):
+            columna[sel] += tabla[:, k][rango]
+        self._version[sel] += 1
+        por_rango = np.bincount(rango, minlength=len(RANGOS_NINJA))
+        delta = por_rango @ tabla.astype(np.int64)
+        if metricas.activo:
+            metricas.contar("entrenamientos", int(len(rango)))
+        return ResumenEntrenamiento(int(len(rango)), int(delta[0]), int(delta[1]), int(delta[2]))
+
+
+
+# cache de combates: el resultado de una pelea solo depende de ataque y defensa, asi que
+# se guarda por (atacante, defensor, version de las estadisticas de cada uno). entrenar
+# sube la version y las entradas viejas dejan de coincidir; salen solas por LRU.
+# la clave guarda los ninjas mismos y no su id, un id se puede reutilizar
+
+DEFENSOR_RESISTE = 0
+ATACANTE_GANA = 1
+
+
+class CacheCombates:
+    def __init__(self, capacidad: int = 100_000, compacto: bool = False):
+        # compacto guarda solo el codigo del resultado y arma el texto cada vez que se pide
+        if capacidad < 1:
+            raise ValueError("la capacidad debe ser al menos 1")
+        self.capacidad = capacidad
+        self.compacto = compacto
+        self._entradas: OrderedDict[tuple, int | tuple[int, str]] = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.descartes = 0
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def _guardar(self, clave: tuple, valor: int | tuple[int, str]):
+        self._entradas[clave] = valor
+        if len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+            self.descartes += 1
+
+    def _resolver(self, atacante: Ninja, defensor: Ninja):
+        # sin compacto cada entrada es (codigo, texto) y el texto ya esta armado
+        clave = (atacante, defensor, atacante.estadisticas.version, defensor.estadisticas.version)
+        valor = self._entradas.get(clave)
+        if valor is not None:
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+        self.fallos += 1
+        codigo = ATACANTE_GANA if atacante.estadisticas.ataque > defensor.estadisticas.defensa else DEFENSOR_RESISTE
+        valor = codigo if self.compacto else (codigo, self.texto(atacante, defensor, codigo))
+        self._guardar(clave, valor)
+        return valor
+
+    def resultado(self, atacante: Ninja, defensor: Ninja) -> int:
+        valor = self._resolver(atacante, defensor)
+        return valor if self.compacto else valor[0]
+
+    def pelear(self, atacante: Ninja, defensor: Ninja) -> str:
+        valor = self._resolver(atacante, defensor)
+        return self.texto(atacante, defensor, valor) if self.compacto else valor[1]
+
+    @staticmethod
+    def texto(atacante: Ninja, defensor: Ninja, codigo: int) -> str:
+        return texto_pelea(atacante.nombre, defensor.nombre, codigo == ATACANTE_GANA)
+
+    @property
+    def tasa_aciertos(self) -> float:
+        consultas = self.aciertos + self.fallos
+        return self.aciertos / consultas if consultas else 0.0
+
+    def limpiar(self):
+        self._entradas.clear()
+
+    def __str__(self) -> str:
+        return (f"CacheCombates({len(self)}/{self.capacidad} entradas, {self.aciertos} aciertos, {self.fallos} fallos, "
+                f"{self.descartes} descartes, {self.tasa_aciertos:.1%} aciertos)")
+
+
+# combates en lote: se resuelven todos juntos con numpy sobre las columnas del roster
+
+class ResultadoCombates:
+    # solo guarda indices y quien gano; el texto de cada pelea se arma cuando se pide
+    def __init__(self, roster: Roster, atacantes, defensores, gana):
+        self.roster = roster
+        self.atacantes = atacantes
+        self.defensores = defensores
+        self.gana = gana
+
+    def __len__(self) -> int:
+        return len(self.gana)
+
+    @property
+    def ganadores(self):
+        return np.where(self.gana, self.atacantes, self.defensores)
+
+    @property
+    def victorias(self) -> int:
+        return int(np.count_nonzero(self.gana))
+
+    def texto(self, k: int) -> str:
+        return texto_pelea(self.roster.nombre(self.atacantes[k]), self.roster.nombre(self.defensores[k]),
+                           bool(self.gana[k]))
+
+    def __getitem__(self, k: int) -> str:
+        return self.texto(k)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self.texto(k)
+
+
+def pelear_lote(roster: Roster, atacantes, defensores) -> ResultadoCombates:
+    atacantes = np.asarray(atacantes, np.int64)
+    defensores = np.asarray(defensores, np.int64)
+    if atacantes.shape != defensores.shape:
+        raise ValueError("atacantes y defensores deben tener el mismo largo")
+    gana = roster.ataque[atacantes] > roster.defensa[defensores]
+    if metricas.activo:
+        metricas.contar("peleas", len(gana))
+    return ResultadoCombates(roster, atacantes, defensores, gana)
+
+
+def round_robin(roster: Roster, indices=None):
+    # matriz[i, j] es True si el ninja indices[i] gana atacando a indices[j]
+    indices = np.arange(len(roster)) if indices is None else np.asarray(indices, np.int64)
+    matriz = roster.ataque[indices][:, None] > roster.defensa[indices][None, :]
+    np.fill_diagonal(matriz, False)
+    if metricas.activo:
+        metricas.contar("peleas", len(indices) * (len(indices) - 1))
+    return matriz
+
+
+def round_robin_aldeas(*aldeas: Aldea) -> tuple[Roster, "np.ndarray"]:
+    roster = Roster.desde_aldeas(aldeas)
+    return roster, round_robin(roster)
+
+
+# batallas por equipos: aldea contra aldea por rondas. todo el estado esta en arreglos
+# (G, N): G = 2 * batallas (primero los equipos A, despues los B) y N = tamaño del equipo
+# mas grande, asi miles de batallas avanzan juntas en cada tick. en cada ronda cada ninja
+# vivo usa el jutsu mas caro que le alcanza el chakra (o un golpe simple) contra un
+# enemigo vivo al azar; el daño de todos se aplica a la vez
+
+class ResultadoBatallas:
+    # ganador: 1 gana el equipo A, -1 gana el B, 0 empate
+    def __init__(self, ganador, rondas, vivos, vida, chakra_gastado, jutsus_usados):
+        self.ganador = ganador
+        self.rondas = rondas
+        self.vivos = vivos  # (2, batallas)
+        self.vida = vida
+        self.chakra_gastado = chakra_gastado
+        self.jutsus_usados = jutsus_usados
+
+    def __len__(self) -> int:
+        return len(self.ganador)
+
+    @property
+    def victorias(self) -> tuple[int, int, int]:
+        return (int(np.count_nonzero(self.ganador == 1)), int(np.count_nonzero(self.ganador == -1)),
+                int(np.count_nonzero(self.ganador == 0)))
+
+    def __str__(self) -> str:
+        a, b, empates = self.victorias
+        if len(self) == 1:
+            quien = {1: "gana el equipo A", -1: "gana el equipo B", 0: "empate"}[int(self.ganador[0])]
+            return (f"{quien} en {int(self.rondas[0])} rondas: quedan {int(self.vivos[0, 0])} contra "
+                    f"{int(self.vivos[1, 0])}, chakra gastado {int(self.chakra_gastado[0, 0])} contra "
+                    f"{int(self.chakra_gastado[1, 0])}")
+        return f"{len(self)} batallas: A gana {a}, B gana {b}, {empates} empates"
+
+
+class MotorBatallas:
+    VIDA_BASE = 100
+    FACTOR_JUTSU = 2  # un jutsu pega ataque + FACTOR_JUTSU * costo_chakra
+    REGENERACION = 5  # chakra que se recupera por ronda, sin pasar del inicial
+    _SIN_JUTSU = 2 ** 31 - 1  # maximo de int32
+
+    def __init__(self, ataque, defensa, chakra, costos, presentes, seed: int = 0):
+        # todos (G, N) salvo costos (G, N, J) ordenado de mayor a menor con _SIN_JUTSU de relleno
+        self.ataque = np.asarray(ataque, np.int64)
+        self.defensa = np.asarray(defensa, np.int64)
+        self.chakra_max = np.asarray(chakra, np.int64)
+        self.costos = np.asarray(costos, np.int64)
+        presentes = np.asarray(presentes, bool)
+        self.grupos, self.tam = self.ataque.shape
+        if self.grupos % 2:
+            raise ValueError("cada batalla necesita dos equipos")
+        self.batallas = self.grupos // 2
+        self.chakra = np.where(presentes, self.chakra_max, 0)
+        self.vida = np.where(presentes, self.VIDA_BASE + self.defensa, 0)
+        self.vivo = presentes & (self.vida > 0)
+        self.rng = np.random.default_rng(seed)
+        self.ronda = 0
+        self.rondas = np.zeros(self.batallas, np.int64)
+        self.activa = np.ones(self.batallas, bool)
+        self.chakra_gastado = np.zeros(self.grupos, np.int64)
+        self.jutsus_usados = np.zeros(self.grupos, np.int64)
+        # el enemigo del grupo g es el grupo (g + batallas) % grupos
+        self.enemigo = (np.arange(self.grupos) + self.batallas) % self.grupos
+        self._actualizar_activas()
+
+    @classmethod
+    def desde_equipos(cls, equipos_a: list[Iterable[Ninja]], equipos_b: list[Iterable[Ninja]],
+                      seed: int = 0) -> "MotorBatallas":
+        # sirve con Ninja o NinjaView; los equipos mas chicos se rellenan con lugares vacios
+        if len(equipos_a) != len(equipos_b):
+            raise ValueError("tiene que haber la misma cantidad de equipos A y B")
+        equipos = [list(e) for e in equipos_a] + [list(e) for e in equipos_b]
+        tam = max((len(e) for e in equipos), default=0)
+        jutsus = max((len(n.jutsus) for e in equipos for n in e), default=0)
+        forma = (len(equipos), max(tam, 1))
+        ataque, defensa, chakra = np.zeros(forma, np.int64), np.zeros(forma, np.int64), np.zeros(forma, np.int64)
+        costos = np.full(forma + (max(jutsus, 1),), cls._SIN_JUTSU, np.int64)
+        presentes = np.zeros(forma, bool)
+        for g, equipo in enumerate(equipos):
+            for i, ninja in enumerate(equipo):
+                est = ninja.estadisticas
+                ataque[g, i], defensa[g, i], chakra[g, i] = est.ataque, est.defensa, est.chakra
+                presentes[g, i] = True
+                for k, costo in enumerate(sorted((j.costo_chakra for j in ninja.jutsus), reverse=True)):
+                    costos[g, i, k] = costo
+        return cls(ataque, defensa, chakra, costos, presentes, seed)
+
+    @classmethod
+    def desde_roster(cls, roster: Roster, indices_a, indices_b, seed: int = 0) -> "MotorBatallas":
+        # indices (batallas, N) de filas del roster, -1 para lugares vacios. no crea objetos por ninja
+        indices = np.concatenate([np.atleast_2d(np.asarray(indices_a, np.int64)),
+                                  np.atleast_2d(np.asarray(indices_b, np.int64))])
+        presentes = indices >= 0
+        filas = np.where(presentes, indices, 0)
+        conjuntos = roster._conjuntos
+        jutsus = max(max((len(c) for c in conjuntos), default=0), 1)
+        tabla = np.full((len(conjuntos), jutsus), cls._SIN_JUTSU, np.int64)
+        for c, conjunto in enumerate(conjuntos):
+            costos = sorted((j.costo_chakra for j in conjunto), reverse=True)
+            tabla[c, :len(costos)] = costos
+        return cls(roster.ataque[filas], roster.defensa[filas], roster.chakra[filas],
+                   tabla[roster._jutsus[:len(roster)][filas]], presentes, seed)
+
+    def _actualizar_activas(self):
+        vivos = self.vivo.sum(axis=1).reshape(2, self.batallas)
+        self.activa &= (vivos[0] > 0) & (vivos[1] > 0)
+
+    def paso(self) -> bool:
+        # una ronda para todas las batallas activas; devuelve si queda alguna
+        if not self.activa.any():
+            return False
+        self.ronda += 1
+        self.rondas[self.activa] = self.ronda
+        atacan = self.vivo & np.tile(self.activa, 2)[:, None]
+
+        # jutsu: el primero (mas caro) que alcance el chakra; si ninguno, golpe simple
+        alcanza = self.costos <= self.chakra[:, :, None]
+        usa = atacan & alcanza.any(axis=2)
+        elegido = alcanza.argmax(axis=2)
+        costo = np.where(usa, np.take_along_axis(self.costos, elegido[:, :, None], axis=2)[:, :, 0], 0)
+        self.chakra -= costo
+        self.chakra_gastado += costo.sum(axis=1)
+        self.jutsus_usados += usa.sum(axis=1)
+        dano = self.ataque + self.FACTOR_JUTSU * costo
+
+        # objetivo: el k-esimo enemigo vivo, con k al azar. cum cuenta vivos sobre todos los
+        # grupos aplanados, asi un solo searchsorted resuelve los objetivos de todas las batallas
+        cum = np.cumsum(self.vivo.ravel())
+        antes = np.concatenate(([0], cum[self.tam - 1::self.tam][:-1]))
+        vivos_enemigo = self.vivo.sum(axis=1)[self.enemigo]
+        g, i = np.nonzero(atacan & (vivos_enemigo > 0)[:, None])
+        e = self.enemigo[g]
+        k = antes[e] + (self.rng.random(len(g)) * vivos_enemigo[g]).astype(np.int64) + 1
+        objetivo = np.searchsorted(cum, k)
+
+        defensa = self.defensa.ravel()[objetivo]
+        efectivo = np.maximum(dano[g, i] - defensa // 2, 1)
+        recibido = np.bincount(objetivo, weights=efectivo, minlength=self.vida.size).reshape(self.vida.shape)
+        self.vida -= recibido.astype(np.int64)
+        self.vivo &= self.vida > 0
+        self.chakra = np.where(self.vivo, np.minimum(self.chakra + self.REGENERACION, self.chakra_max), self.chakra)
+        self._actualizar_activas()
+        return bool(self.activa.any())
+
+    def simular(self, max_rondas: int = 100) -> ResultadoBatallas:
+        while self.ronda < max_rondas and self.paso():
+            pass
+        vivos = self.vivo.sum(axis=1).reshape(2, self.batallas)
+        vida = np.where(self.vivo, self.vida, 0).sum(axis=1).reshape(2, self.batallas)
+        # si se acaban las rondas con los dos equipos en pie, gana el que conserva mas vida
+        ganador = np.sign(vida[0] - vida[1]).astype(np.int8)
+        ganador[(vivos[0] > 0) & (vivos[1] == 0)] = 1
+        ganador[(vivos[0] == 0) & (vivos[1] > 0)] = -1
+        ganador[(vivos[0] == 0) & (vivos[1] == 0)] = 0
+        if metricas.activo:
+            metricas.contar("batallas", self.batallas)
+        return ResultadoBatallas(ganador, self.rondas.copy(), vivos, vida,
+                                 self.chakra_gastado.reshape(2, self.batallas),
+                                 self.jutsus_usados.reshape(2, self.batallas))
+
+
+def guerra_aldeas(aldea_a: Aldea, aldea_b: Aldea, seed: int = 0, max_rondas: int = 100) -> ResultadoBatallas:
+    return MotorBatallas.desde_equipos([aldea_a.ninjas], [aldea_b.ninjas], seed).simular(max_rondas)
+
+
+# entrenamiento masivo: incrementos iguales para todos o un plan por rango
+
+class PlanEntrenamiento:
+    def __init__(self, por_rango: dict[RangoNinja, tuple[int, int, int]] | None = None,
+                 base: tuple[int, int, int] = (0, 0, 0)):
+        # por_rango[rango] = (inc_ataque, inc_defensa, inc_chakra); los rangos que faltan usan base
+        self.por_rango = dict(por_rango or {})
+        self.base = base
+
+    def incrementos(self, rango: RangoNinja) -> tuple[int, int, int]:
+        return self.por_rango.get(rango, self.base)
+
+    def tabla(self):
+        return np.array([self.incrementos(r) for r in RANGOS_NINJA], np.int32)
+
+
+class ResumenEntrenamiento:
+    __slots__ = ("ninjas", "ataque", "defensa", "chakra")
+
+    def __init__(self, ninjas: int = 0, ataque: int = 0, defensa: int = 0, chakra: int = 0):
+        self.ninjas = ninjas
+        self.ataque = ataque
+        self.defensa = defensa
+        self.chakra = chakra
+
+    def __repr__(self):
+        return (f"ResumenEntrenamiento(ninjas={self.ninjas}, ataque=+{self.ataque}, "
+                f"defensa=+{self.defensa}, chakra=+{self.chakra})")
+
+
+def entrenar_lote(objetivo: Roster | Iterable[Ninja], plan: PlanEntrenamiento | None = None,
+                  inc_ataque: int = 0, inc_defensa: int = 0, inc_chakra: int = 0) -> ResumenEntrenamiento:
+    if isinstance(objetivo, Roster):
+        return objetivo.entrenar(inc_ataque=inc_ataque, inc_defensa=inc_defensa, inc_chakra=inc_chakra, plan=plan)
+    resumen = ResumenEntrenamiento()
+    for ninja in objetivo:
+        ia, idf, ic = plan.incrementos(ninja.rango) if plan else (inc_ataque, inc_defensa, inc_chakra)
+        ninja.estadisticas.entrenar(inc_ataque=ia, inc_defensa=idf, inc_chakra=ic)
+        resumen.ninjas += 1
+        resumen.ataque += ia
+        resumen.defensa += idf
+        resumen.chakra += ic
+    return resumen
+
+
+# torneos: eliminacion directa, suizo y todos contra todos. las peleas de cada ronda
+# se reparten en tandas a un ProcessPoolExecutor; el resultado de cada duelo solo
+# depende de las estadisticas, asi que la clasificacion no cambia con la cantidad de workers
+
+_COLUMNAS_TORNEO = None
+
+
+def _iniciar_torneo(ataque, defensa, poder):
+    global _COLUMNAS_TORNEO
+    _COLUMNAS_TORNEO = (ataque, defensa, poder)
+
+
+def _duelos(a, b):
+    # duelo de ida y vuelta: +1 gana a, -1 gana b, 0 empate. si los dos
+    # golpean (o ninguno) decide la suma de estadisticas
+    ataque, defensa, poder = _COLUMNAS_TORNEO
+    resultado = (ataque[a] > defensa[b]).astype(np.int8) - (ataque[b] > defensa[a]).astype(np.int8)
+    empate = resultado == 0
+    resultado[empate] = np.sign(poder[a] - poder[b])[empate]
+    return resultado
+
+
+def _resolver_tanda(tanda):
+    a, b = tanda
+    return _duelos(a, b)
+
+
+def _todos_contra_todos_bloque(bloque):
+    # victorias y derrotas de las filas ini:fin contra todos los participantes
+    ini, fin = bloque
+    ataque, defensa, poder = _COLUMNAS_TORNEO
+    golpe_a = ataque[ini:fin, None] > defensa[None, :]
+    golpe_b = ataque[None, :] > defensa[ini:fin, None]
+    diferencia = poder[ini:fin, None] - poder[None, :]
+    misma = golpe_a == golpe_b
+    gana = (golpe_a & ~golpe_b) | (misma & (diferencia > 0))
+    pierde = (golpe_b & ~golpe_a) | (misma & (diferencia < 0))
+    return np.count_nonzero(gana, axis=1), np.count_nonzero(pierde, axis=1)
+
+
+class PuestoTorneo:
+    __slots__ = ("posicion", "ninja", "puntos", "victorias", "derrotas")
+
+    def __init__(self, posicion: int, ninja: Ninja, puntos: float, victorias: int, derrotas: int):
+        self.posicion = posicion
+        self.ninja = ninja
+        self.puntos = puntos
+        self.victorias = victorias
+        self.derrotas = derrotas
+
+    def __repr__(self):
+        return f"{self.posicion}. {self.ninja.nombre} ({self.puntos} pts, {self.victorias}V {self.derrotas}D)"
+
+
+class Torneo:
+    def __init__(self, participantes: Iterable[Ninja], workers: int | None = None, tam_tanda: int = 1_000_000):
+        self.participantes = list(participantes)
+        n = len(self.participantes)
+        self.ataque = np.fromiter((p.estadisticas.ataque for p in self.participantes), np.int64, n)
+        self.defensa = np.fromiter((p.estadisticas.defensa for p in self.participantes), np.int64, n)
+        chakra = np.fromiter((p.estadisticas.chakra for p in self.participantes), np.int64, n)
+        self.poder = self.ataque + self.defensa + chakra
+        self.workers = workers or os.cpu_count() or 1
+        self.tam_tanda = tam_tanda
+        self.peleas = 0
+
+    @classmethod
+    def desde_aldeas(cls, aldeas: Iterable[Aldea], **kwargs) -> "Torneo":
+        return cls([n for a in aldeas for n in a.ninjas], **kwargs)
+
+    def _pool(self):
+        columnas = (self.ataque, self.defensa, self.poder)
+        if self.workers == 1:
+            _iniciar_torneo(*columnas)
+            return None
+        return ProcessPoolExecutor(self.workers, initializer=_iniciar_torneo, initargs=columnas)
+
+    def _tamano(self, total: int, minimo: int) -> int:
+        # tandas de a lo sumo tam_tanda, pero al menos ~4 por worker para repartir la carga
+        return max(minimo, min(self.tam_tanda, -(-total // (4 * self.workers))))
+
+    def _resolver(self, pool, a, b):
+        self.peleas += len(a)
+        if metricas.activo:
+            metricas.contar("peleas", len(a))
+        tam = self._tamano(len(a), 1024)
+        tandas = [(a[i:i + tam], b[i:i + tam]) for i in range(0, len(a), tam)]
+        if not tandas:
+            return np.zeros(0, np.int8)
+        resultados = pool.map(_resolver_tanda, tandas) if pool else map(_resolver_tanda, tandas)
+        return np.concatenate(list(resultados))
+
+    def _clasificacion(self, claves, puntos, victorias, derrotas) -> list[PuestoTorneo]:
+        # claves ordena de mejor a peor; el indice de siembra desempata
+        orden = np.lexsort((np.arange(len(self.participantes)),) + tuple(-np.asarray(c) for c in reversed(claves)))
+        # .item() y int(): numeros de python, no escalares numpy (json.dumps no acepta np.int64)
+        puntos = np.asarray(puntos)
+        return [PuestoTorneo(pos, self.participantes[i], puntos[i].item(), int(victorias[i]), int(derrotas[i]))
+                for pos, i in enumerate(orden, 1)]
+
+    def eliminacion_directa(self) -> list[PuestoTorneo]:
+        n = len(self.participantes)
+        ronda_alcanzada = np.zeros(n, np.int64)
+        victorias = np.zeros(n, np.int64)
+        derrotas = np.zeros(n, np.int64)
+        vivos = np.arange(n)
+        pool = self._pool()
+        try:
+            ronda = 0
+            while len(vivos) > 1:
+                ronda += 1
+                # en la primera ronda los mejores sembrados pasan directo hasta
+                # completar una potencia de dos; despues todas las rondas son pares
+                libres = (1 << (len(vivos) - 1).bit_length()) - len(vivos)
+                libre, en_juego = vivos[:libres], vivos[libres:]
+                # se vuelve a sembrar cada ronda: el mejor contra el peor que queda
+                mitad = len(en_juego) // 2
+                a, b = en_juego[:mitad], en_juego[mitad:][::-1]
+                resultado = self._resolver(pool, a, b)
+                ganan = np.where(resultado >= 0, a, b)
+                pierden = np.where(resultado >= 0, b, a)
+                victorias[ganan] += 1
+                derrotas[pierden] += 1
+                ronda_alcanzada[pierden] = ronda
+                vivos = np.sort(np.concatenate((libre, ganan)))
+        finally:
+            if pool:
+                pool.shutdown()
+        ronda_alcanzada[vivos] = ronda + 1
+        return self._clasificacion((ronda_alcanzada, victorias), victorias, victorias, derrotas)
+
+    def suizo(self, rondas: int | None = None) -> list[PuestoTorneo]:
+        n = len(self.participantes)
+        rondas = rondas or max(1, (n - 1).bit_length())
+        puntos = np.zeros(n, np.int64)  # dobles: 2 victoria, 1 empate
+        victorias = np.zeros(n, np.int64)
+        derrotas = np.zeros(n, np.int64)
+        siembra = np.arange(n)
+        pool = self._pool()
+        try:
+            for _ in range(rondas):
+                # se emparejan vecinos de la tabla actual; el ultimo con cantidad impar descansa y suma victoria
+                tabla = np.lexsort((siembra, -puntos))
+                if n % 2:
+                    puntos[tabla[-1]] += 2
+                    tabla = tabla[:-1]
+                a, b = tabla[0::2], tabla[1::2]
+                resultado = self._resolver(pool, a, b)
+                puntos[a] += 1 + resultado
+                puntos[b] += 1 - resultado
+                victorias[a[resultado > 0]] += 1
+                victorias[b[resultado < 0]] += 1
+                derrotas[a[resultado < 0]] += 1
+                derrotas[b[resultado > 0]] += 1
+        finally:
+            if pool:
+                pool.shutdown()
+        return self._clasificacion((puntos, victorias), puntos / 2, victorias, derrotas)
+
+    def todos_contra_todos(self) -> list[PuestoTorneo]:
+        n = len(self.participantes)
+        filas = min(self._tamano(n, 1), max(1, self.tam_tanda // max(n, 1)))
+        bloques = [(i, min(i + filas, n)) for i in range(0, n, filas)]
+        pool = self._pool()
+        try:
+            resultados = list(pool.map(_todos_contra_todos_bloque, bloques) if pool
+                              else map(_todos_contra_todos_bloque, bloques))
+        finally:
+            if pool:
+                pool.shutdown()
+        self.peleas += n * (n - 1)
+        victorias = np.concatenate([r[0] for r in resultados]) if resultados else np.zeros(0, np.int64)
+        derrotas = np.concatenate([r[1] for r in resultados]) if resultados else np.zeros(0, np.int64)
+        # el duelo contra si mismo sale empate y no se cuenta
+        puntos = 2 * victorias + (n - 1 - victorias - derrotas)
+        return self._clasificacion((puntos, victorias), puntos / 2, victorias, derrotas)
+
+
+# despacho de misiones: cada ninja recibe a lo sumo una mision que pida su rango o uno menor
+
+class ResultadoAsignacion:
+    def __init__(self):
+        self.asignaciones: list[tuple[Mision, Ninja]] = []
+        self.sin_asignar: list[Mision] = []
+
+    @property
+    def recompensa_total(self) -> int:
+        return sum(m.recompensa for m, _ in self.asignaciones)
+
+    def __repr__(self):
+        return (f"ResultadoAsignacion({len(self.asignaciones)} asignadas, {len(self.sin_asignar)} sin asignar, "
+                f"recompensa={self.recompensa_total})")
+
+
+class DespachadorMisiones:
+    # un balde de ninjas libres por rango; cada mision toma al ninja libre de menor
+    # rango que la pueda hacer, asi los rangos altos quedan para las misiones que los piden
+    def __init__(self, ninjas: Iterable[Ninja] = ()):
+        self._libres: list[deque[Ninja]] = [deque() for _ in RANGOS_NINJA]
+        for ninja in ninjas:
+            self.agregar(ninja)
+
+    def agregar(self, ninja: Ninja):
+        self._libres[_NIVEL_RANGO[ninja.rango]].append(ninja)
+
+    @property
+    def libres(self) -> int:
+        return sum(len(balde) for balde in self._libres)
+
+    def _tomar(self, nivel: int) -> Ninja | None:
+        for balde in self._libres[nivel:]:
+            if balde:
+                return balde.popleft()
+        return None
+
+    def despachar(self, misiones: Iterable[Mision], modo: str = "optimo") -> ResultadoAsignacion:
+        # greedy: en el orden de la cola. optimo: primero las de mayor recompensa; como los ninjas
+        # elegibles de cada rango contienen a los del rango siguiente, eso da la recompensa maxima
+        if modo == "optimo":
+            misiones = sorted(misiones, key=lambda m: m.recompensa, reverse=True)
+        elif modo != "greedy":
+            raise ValueError("modo debe ser 'greedy' u 'optimo'")
+        resultado = ResultadoAsignacion()
+        for mision in misiones:
+            ninja = self._tomar(_NIVEL_RANGO[mision.rango_requerido])
+            if ninja is None:
+                resultado.sin_asignar.append(mision)
+            else:
+                resultado.asignaciones.append((mision, ninja))
+        return resultado
+
+
+def asignar_misiones(misiones: Iterable[Mision], ninjas: Iterable[Ninja], modo: str = "optimo") -> ResultadoAsignacion:
+    return DespachadorMisiones(ninjas).despachar(misiones, modo)
+
+# mundo: aldeas, ninjas y misiones de una sesion, con su registro de busqueda
+
+class Mundo:
+    def __init__(self, aldeas: Iterable[Aldea] = (), ninjas: Iterable[Ninja] = (), misiones: Iterable[Mision] = ()):
+        self.aldeas: list[Aldea] = list(aldeas)
+        self.ninjas: list[Ninja] = list(ninjas)
+        self.misiones: list[Mision] = list(misiones)
+        self.registro = Registro()
+        for aldea in self.aldeas:
+            self.registro.registrar_aldea(aldea)
+        for ninja in self.ninjas:
+            self.registro.registrar_ninja(ninja)
+        # log de eventos opcional, lo engancha Bitacora.recuperar
+        self.bitacora: "Bitacora | None" = None
+
+    # operaciones del menu sin input(), para que las use tambien el servidor.
+    # los errores de datos salen como ValueError
+
+    def crear_aldea(self, nombre: str) -> Aldea:
+        aldea = self.registro.registrar_aldea(Aldea(nombre))
+        if self.bitacora is not None:
+            self.bitacora.aldea_creada(aldea)
+        self.aldeas.append(aldea)
+        return aldea
+
+    def agregar_ninja(self, ninja: Ninja, aldea: str) -> Ninja:
+        destino = self.registro.buscar_aldea(aldea)
+        if destino is None:
+            raise ValueError(f"aldea no encontrada: {aldea}")
+        if self.bitacora is not None:
+            # antes del add_ninja, asi el aviso de asignacion ya lo encuentra anotado
+            self.bitacora.ninja_creado(ninja, destino)
+        destino.add_ninja(ninja)
+        self.registro.registrar_ninja(ninja)
+        self.ninjas.append(ninja)
+        return ninja
+
+    def crear_ninja(self, nombre: str, aldea: str, origen: str | None = None, rango: RangoNinja = RangoNinja.GENIN,
+                    estadisticas: Estadisticas | None = None, jutsus: Iterable[Jutsu] = ()) -> Ninja:
+        # con origen se usa la fabrica de esa aldea, si no el builder
+        if origen is not None:
+            factory = FABRICAS.get(origen.strip().lower())
+            if factory is None:
+                raise ValueError(f"aldea de origen no válida: {origen}")
+            ninja = factory.crear_ninja(nombre)
+        else:
+            builder = NinjaBuilder().with_nombre(nombre).with_rango(rango)
+            if estadisticas is not None:
+                builder.with_estadisticas(estadisticas)
+            ninja = builder.build()
+        for jutsu in jutsus:
+            ninja.add_jutsu(jutsu)
+        return self.agregar_ninja(ninja, aldea)
+
+    def poblar(self, aldea: str, mezcla: dict[str, int],
+               nombres: GeneradorNombres | Iterable[str] | None = None) -> list[Ninja]:
+        destino = self.registro.buscar_aldea(aldea)
+        if destino is None:
+            raise ValueError(f"aldea no encontrada: {aldea}")
+        ninjas = poblar_aldea(destino, mezcla, nombres)
+        for ninja in ninjas:
+            self.registro.registrar_ninja(ninja)
+        if self.bitacora is not None:
+            for ninja in ninjas:
+                self.bitacora.ninja_creado(ninja, destino)
+        self.ninjas.extend(ninjas)
+        return ninjas
+
+    def crear_mision(self, rango: RangoMision, recompensa: int, rango_requerido: RangoNinja) -> Mision:
+        mision = Mision(rango, recompensa, rango_requerido)
+        if self.bitacora is not None:
+            self.bitacora.mision_creada(mision)
+        self.misiones.append(mision)
+        return mision
+
+    def ninja(self, nombre: str) -> Ninja:
+        ninja = self.registro.buscar_ninja(nombre)
+        if ninja is None:
+            raise ValueError(f"ninja no encontrado: {nombre}")
+        return ninja
+
+    def entrenar(self, nombre: str, inc_ataque=0, inc_defensa=0, inc_chakra=0) -> Ninja:
+        ninja = self.ninja(nombre)
+        ninja.entrenar(inc_ataque=inc_ataque, inc_defensa=inc_defensa, inc_chakra=inc_chakra)
+        return ninja
+
+    def pelear(self, nombre1: str, nombre2: str) -> str:
+        ninja1, ninja2 = self.ninja(nombre1), self.ninja(nombre2)
+        if ninja1 is ninja2:
+            raise ValueError("debes elegir ninjas distintos")
+        return ninja1.pelear(ninja2)
+
+    def guardar_snapshot(self, ruta: str) -> str:
+        return guardar_snapshot(ruta, self.aldeas, self.ninjas, self.misiones)
+
+    @classmethod
+    def cargar_snapshot(cls, ruta: str) -> "Mundo":
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            return _cargar_snapshot_sin_numpy(ruta)
+        return Snapshot(ruta).mundo()
+
+
+# snapshot binario: cabecera con una tabla de secciones (nombre, dtype, offset, cantidad)
+# y despues cada columna alineada a 8 bytes. al cargar, cada seccion es un np.frombuffer
+# sobre un mmap, asi que solo se leen del disco las paginas que se usan. sin numpy se
+# escribe y se lee el mismo formato con array (copiando), para que la bitacora siga andando
+
+SNAPSHOT_MAGIC = b"NRTSNAP1"
+SNAPSHOT_VERSION = 1
+_CABECERA = struct.Struct("<8sII")
+_SECCION = struct.Struct("<16s8sQQ")
+RANGOS_MISION = list(RangoMision)
+_NIVEL_MISION = {r: i for i, r in enumerate(RANGOS_MISION)}
+
+
+def _tabla_cadenas(cadenas: list[str]):
+    codificadas = [c.encode("utf-8") for c in cadenas]
+    offsets = np.zeros(len(codificadas) + 1, np.int64)
+    offsets[1:] = np.cumsum([len(c) for c in codificadas])
+    return offsets, np.frombuffer(b"".join(codificadas), np.uint8)
+
+
+def guardar_snapshot(ruta: str, aldeas: Iterable[Aldea], ninjas: Roster | Iterable[Ninja],
+                     misiones: Iterable[Mision]) -> str:
+    if not isinstance(ninjas, Roster):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            return _guardar_snapshot_sin_numpy(ruta, aldeas, ninjas, misiones)
+    roster = ninjas if isinstance(ninjas, Roster) else Roster.desde_ninjas(ninjas)
+    n = len(roster)
+
+    # aldeas: las del mundo primero, despues las que solo aparecen en el roster
+    aldeas = list(aldeas)
+    ids = {a: i for i, a in enumerate(aldeas)}
+    for aldea in roster.aldeas:
+        if aldea not in ids:
+            ids[aldea] = len(aldeas)
+            aldeas.append(aldea)
+    remapeo = np.array([ids[a] for a in roster.aldeas] + [-1], np.int32)
+    aldea_ninja = remapeo[roster.aldea_id] if n else np.zeros(0, np.int32)
+
+    # jutsus distintos y conjuntos de jutsus por ninja en formato CSR
+    jutsus: list[Jutsu] = []
+    id_jutsu: dict[int, int] = {}
+    conj_ptr = [0]
+    conj_ids: list[int] = []
+    for conjunto in roster._conjuntos:
+        for j in conjunto:
+            if id(j) not in id_jutsu:
+                id_jutsu[id(j)] = len(jutsus)
+                jutsus.append(j)
+            conj_ids.append(id_jutsu[id(j)])
+        conj_ptr.append(len(conj_ids))
+
+    cadenas: list[str] = []
+    id_cadena: dict[str, int] = {}
+
+    def cadena(texto: str) -> int:
+        if texto not in id_cadena:
+            id_cadena[texto] = len(cadenas)
+            cadenas.append(texto)
+        return id_cadena[texto]
+
+    aldea_nom = np.array([cadena(a.nombre) for a in aldeas], np.uint32)
+    jutsu_nom = np.array([cadena(j.nombre) for j in jutsus], np.uint32)
+    jutsu_costo = np.array([j.costo_chakra for j in jutsus], np.int32)
+    jutsu_efe = np.array([cadena(j.efecto) for j in jutsus], np.uint32)
+    cad_off, cad_datos = _tabla_cadenas(cadenas)
+
+    misiones = list(misiones)
+    secciones = {
+        "cad_off": cad_off,
+        "cad_datos": cad_datos,
+        "aldea_nom": aldea_nom,
+        "jutsu_nom": jutsu_nom,
+        "jutsu_costo": jutsu_costo,
+        "jutsu_efe": jutsu_efe,
+        "conj_ptr": np.array(conj_ptr, np.int64),
+        "conj_ids": np.array(conj_ids, np.uint32),
+        "nin_nom_off": roster._offsets[:n + 1],
+        "nin_nom": np.frombuffer(roster._nombres, np.uint8, count=int(roster._offsets[n])),
+        "nin_rango": roster.rango,
+        "nin_aldea": aldea_ninja.astype(np.int32),
+        "nin_ataque": roster.ataque,
+        "nin_defensa": roster.defensa,
+        "nin_chakra": roster.chakra,
+        "nin_jutsus": roster._jutsus[:n],
+        "mis_rango": np.array([_NIVEL_MISION[m.rango] for m in misiones], np.uint8),
+        "mis_recomp": np.array([m.recompensa for m in misiones], np.int64),
+        "mis_req": np.array([_NIVEL_RANGO[m.rango_requerido] for m in misiones], np.uint8),
+    }
+
+    full_path = _escribir_snapshot(ruta, {nombre: (a.dtype.str, len(a), memoryview(np.ascontiguousarray(a)).cast("B"))
+                                          for nombre, a in secciones.items()})
+    return f"Snapshot guardado en: {full_path} ({n} ninjas, {len(misiones)} misiones)"
+
+
+def _escribir_snapshot(ruta: str, secciones: dict[str, tuple[str, int, memoryview]]) -> str:
+    # secciones: nombre -> (dtype de numpy, cantidad, bytes)
+    if not ruta.endswith('.snap'):
+        ruta += '.snap'
+    full_path = os.path.abspath(ruta)
+    offset = _CABECERA.size + _SECCION.size * len(secciones)
+    tabla = []
+    for nombre, (dtype, cantidad, datos) in secciones.items():
+        offset += -offset % 8
+        tabla.append(_SECCION.pack(nombre.encode(), dtype.encode(), offset, cantidad))
+        offset += len(datos)
+    with open(full_path, "wb") as f:
+        f.write(_CABECERA.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(secciones)))
+        f.write(b"".join(tabla))
+        for _, _, datos in secciones.values():
+            f.write(b"\0" * (-f.tell() % 8))
+            f.write(datos)
+    return full_path
+
+
+def _tabla_snapshot(datos, ruta: str) -> dict[str, tuple[str, int, int]]:
+    # nombre -> (dtype, offset, cantidad)
+    if len(datos) < _CABECERA.size:
+        raise ValueError(f"{ruta} no es un snapshot valido")
+    magic, version, n_secciones = _CABECERA.unpack_from(datos, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"{ruta} no es un snapshot valido")
+    tabla = {}
+    for k in range(n_secciones):
+        nombre, dtype, offset, cantidad = _SECCION.unpack_from(datos, _CABECERA.size + k * _SECCION.size)
+        tabla[nombre.rstrip(b"\0").decode()] = (dtype.rstrip(b"\0").decode(), offset, cantidad)
+    return tabla
+
+
+# tipos de array equivalentes a los dtypes del snapshot: (tipo, bytes) -> typecode
+_TYPECODES = {("u", 1): "B", ("i", 1): "b", ("u", 2): "H", ("i", 2): "h",
+              ("u", 4): "I", ("i", 4): "i", ("u", 8): "Q", ("i", 8): "q"}
+_DTYPES = {codigo: f"{'|' if tam == 1 else '<'}{tipo}{tam}" for (tipo, tam), codigo in _TYPECODES.items()}
+
+
+def _columna_sin_numpy(codigo: str, valores) -> tuple[str, int, memoryview]:
+    arreglo = array(codigo, valores)
+    if sys.byteorder == "big":
+        arreglo.byteswap()
+    return _DTYPES[codigo], len(arreglo), memoryview(arreglo).cast("B")
+
+
+def _aldeas_snapshot(aldeas: Iterable[Aldea], ninjas: Iterable[Ninja]) -> list[Aldea]:
+    # el orden en que guardar_snapshot escribe las aldeas: las del mundo primero, despues las
+    # que solo aparecen como aldea de algun ninja
+    aldeas = list(aldeas)
+    vistas = set(aldeas)
+    for ninja in ninjas:
+        if ninja.aldea is not None and ninja.aldea not in vistas:
+            vistas.add(ninja.aldea)
+            aldeas.append(ninja.aldea)
+    return aldeas
+
+
+def _guardar_snapshot_sin_numpy(ruta: str, aldeas: Iterable[Aldea], ninjas: Iterable[Ninja],
+                                misiones: Iterable[Mision]) -> str:
+    # mismas secciones y tipos que guardar_snapshot, armadas con listas
+    ninjas = list(ninjas)
+    aldeas = _aldeas_snapshot(aldeas, ninjas)
+    ids = {a: i for i, a in enumerate(aldeas)}
+
+    jutsus: list[Jutsu] = []
+    id_jutsu: dict[int, int] = {}
+    conj_ptr = [0, 0]  # el conjunto 0 es el vacio
+    conj_ids: list[int] = []
+    id_conjunto: dict[tuple[int, ...], int] = {(): 0}
+    nin_jutsus = []
+    for ninja in ninjas:
+        clave = tuple(id(j) for j in ninja.jutsus)
+        if clave not in id_conjunto:
+            id_conjunto[clave] = len(conj_ptr) - 1
+            for j in ninja.jutsus:
+                if id(j) not in id_jutsu:
+                    id_jutsu[id(j)] = len(jutsus)
+                    jutsus.append(j)
+                conj_ids.append(id_jutsu[id(j)])
+            conj_ptr.append(len(conj_ids))
+        nin_jutsus.append(id_conjunto[clave])
+
+    cadenas: list[str] = []
+    id_cadena: dict[str, int] = {}
+
+    def cadena(texto: str) -> int:
+        if texto not in id_cadena:
+            id_cadena[texto] = len(cadenas)
+            cadenas.append(texto)
+        return id_cadena[texto]
+
+    def tabla(textos) -> tuple[list[int], bytes]:
+        codificados = [t.encode("utf-8") for t in textos]
+        offsets = [0]
+        for c in codificados:
+            offsets.append(offsets[-1] + len(c))
+        return offsets, b"".join(codificados)
+
+    aldea_nom = [cadena(a.nombre) for a in aldeas]
+    jutsu_nom = [cadena(j.nombre) for j in jutsus]
+    jutsu_efe = [cadena(j.efecto) for j in jutsus]
+    cad_off, cad_datos = tabla(cadenas)
+    nin_nom_off, nin_nom = tabla(n.nombre for n in ninjas)
+
+    misiones = list(misiones)
+    secciones = {
+        "cad_off": _columna_sin_numpy("q", cad_off),
+        "cad_datos": _columna_sin_numpy("B", cad_datos),
+        "aldea_nom": _columna_sin_numpy("I", aldea_nom),
+        "jutsu_nom": _columna_sin_numpy("I", jutsu_nom),
+        "jutsu_costo": _columna_sin_numpy("i", [j.costo_chakra for j in jutsus]),
+        "jutsu_efe": _columna_sin_numpy("I", jutsu_efe),
+        "conj_ptr": _columna_sin_numpy("q", conj_ptr),
+        "conj_ids": _columna_sin_numpy("I", conj_ids),
+        "nin_nom_off": _columna_sin_numpy("q", nin_nom_off),
+        "nin_nom": _columna_sin_numpy("B", nin_nom),
+        "nin_rango": _columna_sin_numpy("B", [_NIVEL_RANGO[n.rango] for n in ninjas]),
+        "nin_aldea": _columna_sin_numpy("i", [-1 if n.aldea is None else ids[n.aldea] for n in ninjas]),
+        "nin_ataque": _columna_sin_numpy("i", [n.estadisticas.ataque for n in ninjas]),
+        "nin_defensa": _columna_sin_numpy("i", [n.estadisticas.defensa for n in ninjas]),
+        "nin_chakra": _columna_sin_numpy("i", [n.estadisticas.chakra for n in ninjas]),
+        "nin_jutsus": _columna_sin_numpy("i", nin_jutsus),
+        "mis_rango": _columna_sin_numpy("B", [_NIVEL_MISION[m.rango] for m in misiones]),
+        "mis_recomp": _columna_sin_numpy("q", [m.recompensa for m in misiones]),
+        "mis_req": _columna_sin_numpy("B", [_NIVEL_RANGO[m.rango_requerido] for m in misiones]),
+    }
+    full_path = _escribir_snapshot(ruta, secciones)
+    return f"Snapshot guardado en: {full_path} ({len(ninjas)} ninjas, {len(misiones)} misiones)"
+
+
+def _cargar_snapshot_sin_numpy(ruta: str) -> "Mundo":
+    # lo mismo que Snapshot(ruta).mundo(), leyendo cada columna a un array
+    if not ruta.endswith('.snap') and not os.path.exists(ruta):
+        ruta += '.snap'
+    with open(ruta, "rb") as f:
+        datos = f.read()
+    c = {}
+    for nombre, (dtype, offset, cantidad) in _tabla_snapshot(datos, ruta).items():
+        codigo = _TYPECODES.get((dtype[1], int(dtype[2:])))
+        if codigo is None:
+            raise ValueError(f"{ruta}: tipo de columna no soportado sin numpy: {dtype}")
+        columna = array(codigo)
+        columna.frombytes(datos[offset:offset + cantidad * columna.itemsize])
+        if (dtype[0] == ">") != (sys.byteorder == "big") and columna.itemsize > 1:
+            columna.byteswap()
+        c[nombre] = columna
+
+    def cadena(i: int) -> str:
+        return str(c["cad_datos"][c["cad_off"][i]:c["cad_off"][i + 1]].tobytes(), "utf-8")
+
+    aldeas = [Aldea(cadena(i)) for i in c["aldea_nom"]]
+    jutsus = [Jutsu(cadena(nom), costo, cadena(efe))
+              for nom, costo, efe in zip(c["jutsu_nom"], c["jutsu_costo"], c["jutsu_efe"])]
+    ptr = c["conj_ptr"]
+    conjuntos = [[jutsus[j] for j in c["conj_ids"][ptr[k]:ptr[k + 1]]] for k in range(len(ptr) - 1)] or [[]]
+    nombres, off = c["nin_nom"].tobytes(), c["nin_nom_off"]
+    ninjas = []
+    for i, (rango, aldea, ataque, defensa, chakra, conjunto) in enumerate(zip(
+            c["nin_rango"], c["nin_aldea"], c["nin_ataque"], c["nin_defensa"], c["nin_chakra"], c["nin_jutsus"])):
+        ninja = Ninja(str(nombres[off[i]:off[i + 1]], "utf-8"), RANGOS_NINJA[rango],
+                      Estadisticas(ataque, defensa, chakra))
+        ninja.jutsus.extend(conjuntos[conjunto])
+        if aldea >= 0:
+            aldeas[aldea].add_ninja(ninja)
+        ninjas.append(ninja)
+    misiones = [Mision(RANGOS_MISION[r], p, RANGOS_NINJA[q])
+                for r, p, q in zip(c["mis_rango"], c["mis_recomp"], c["mis_req"])]
+    return Mundo(aldeas, ninjas, misiones)
+
+
+class MisionesColumnas:
+    # misiones de un snapshot: se arma el objeto Mision solo al pedirlo
+    def __init__(self, rango, recompensa, rango_requerido):
+        self.rango = rango
+        self.recompensa = recompensa
+        self.rango_requerido = rango_requerido
+
+    def __len__(self) -> int:
+        return len(self.recompensa)
+
+    def __getitem__(self, i: int) -> Mision:
+        return Mision(RANGOS_MISION[self.rango[i]], int(self.recompensa[i]), RANGOS_NINJA[self.rango_requerido[i]])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class Snapshot:
+    def __init__(self, ruta: str):
+        if not ruta.endswith('.snap') and not os.path.exists(ruta):
+            ruta += '.snap'
+        with open(ruta, "rb") as f:
+            # copia en escritura: se puede entrenar el roster sin modificar el archivo
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.columnas = {nombre: np.frombuffer(self._mm, np.dtype(dtype), cantidad, offset)
+                         for nombre, (dtype, offset, cantidad) in _tabla_snapshot(self._mm, ruta).items()}
+        c = self.columnas
+
+        # aldeas y jutsus son pocos: se materializan; los ninjas quedan como columnas
+        self.aldeas = [Aldea(self.cadena(i)) for i in c["aldea_nom"]]
+        self.jutsus = [Jutsu(self.cadena(nom), int(costo), self.cadena(efe))
+                       for nom, costo, efe in zip(c["jutsu_nom"], c["jutsu_costo"], c["jutsu_efe"])]
+        ptr = c["conj_ptr"]
+        conjuntos = [tuple(self.jutsus[j] for j in c["conj_ids"][ptr[k]:ptr[k + 1]]) for k in range(len(ptr) - 1)]
+
+        roster = Roster.__new__(Roster)
+        roster._n = len(c["nin_rango"])
+        roster._rango = c["nin_rango"]
+        roster._aldea = c["nin_aldea"]
+        roster._ataque = c["nin_ataque"]
+        roster._defensa = c["nin_defensa"]
+        roster._chakra = c["nin_chakra"]
+        # las versiones no se guardan: solo sirven para el cache de la sesion
+        roster._version = np.zeros(roster._n, np.uint32)
+        roster._jutsus = c["nin_jutsus"]
+        roster._offsets = c["nin_nom_off"]
+        roster._nombres = c["nin_nom"]
+        roster.aldeas = list(self.aldeas)
+        roster._id_aldea = {a: i for i, a in enumerate(self.aldeas)}
+        roster._conjuntos = conjuntos or [()]
+        roster._id_conjunto = {tuple(id(j) for j in conj): k for k, conj in enumerate(roster._conjuntos)}
+        self.roster = roster
+        self.misiones = MisionesColumnas(c["mis_rango"], c["mis_recomp"], c["mis_req"])
+
+    def cadena(self, i: int) -> str:
+        off = self.columnas["cad_off"]
+        return str(self.columnas["cad_datos"][off[i]:off[i + 1]], "utf-8")
+
+    def mundo(self) -> Mundo:
+        # objetos completos para la sesion interactiva
+        aldeas = [Aldea(a.nombre) for a in self.aldeas]
+        ninjas = []
+        for vista in self.roster:
+            est = vista.estadisticas
+            ninja = Ninja(vista.nombre, vista.rango, Estadisticas(est.ataque, est.defensa, est.chakra))
+            ninja.jutsus.extend(vista.jutsus)
+            idx = self.roster._aldea[vista._i]
+            if idx >= 0:
+                aldeas[idx].add_ninja(ninja)
+            ninjas.append(ninja)
+        return Mundo(aldeas, ninjas, self.misiones)
+
+
+# log de eventos: cada cambio del mundo se agrega como una linea json a eventos-<gen>.ndjson.
+# ninjas y aldeas van por su posicion en mundo.ninjas / mundo.aldeas, que el snapshot
+# conserva, asi los eventos de estadisticas son solo enteros. las escrituras se juntan
+# y se hace un fsync por lote (group commit). al arrancar se carga mundo-<gen>.snap y se
+# reproduce su log; compactar() vuelca el mundo a la generacion siguiente y borra la anterior
+
+class Bitacora(Observador):
+    def __init__(self, directorio: str = "naruto_datos", lote: int = 4096, intervalo: float = 0.05,
+                 fsync: bool = True, compactar_cada: int | None = 1_000_000):
+        self.directorio = directorio
+        self.lote = lote
+        self.intervalo = intervalo
+        self.fsync = fsync
+        self.compactar_cada = compactar_cada
+        self.generacion = 0
+        self.mundo: Mundo | None = None
+        self.eventos = 0
+        self.reproducidos = 0
+        self.sincronizaciones = 0
+        self._desde_compactacion = 0
+        self._pendientes: list[str] = []
+        self._ultimo = time.monotonic()
+        self._archivo = None
+        self._indice_aldea: dict[Aldea, int] = {}
+        self._indice_ninja: dict[Ninja, int] = {}
+        # largo de las listas al reproducir (snapshot + registros "a"/"n"): la posicion del proximo
+        self._aldeas_anotadas = 0
+        self._ninjas_anotados = 0
+        self._ninja_de: dict[Estadisticas, Ninja] = {}
+        self._aldea_de: dict[Ninja, Aldea] = {}
+
+    def ruta_snapshot(self, generacion: int) -> str:
+        return os.path.join(self.directorio, f"mundo-{generacion}.snap")
+
+    def ruta_eventos(self, generacion: int) -> str:
+        return os.path.join(self.directorio, f"eventos-{generacion}.ndjson")
+
+    def _generaciones(self, prefijo: str, sufijo: str) -> list[int]:
+        generaciones = []
+        for nombre in os.listdir(self.directorio):
+            if nombre.startswith(prefijo) and nombre.endswith(sufijo):
+                numero = nombre[len(prefijo):-len(sufijo)]
+                if numero.isdigit():
+                    generaciones.append(int(numero))
+        return generaciones
+
+    # arranque
+
+    def recuperar(self) -> Mundo:
+        os.makedirs(self.directorio, exist_ok=True)
+        snapshots = self._generaciones("mundo-", ".snap")
+        self.generacion = max(snapshots, default=0)
+        ruta = self.ruta_snapshot(self.generacion)
+        mundo = Mundo.cargar_snapshot(ruta) if os.path.exists(ruta) else Mundo()
+        # sin bitacora ni suscripcion todavia, la reproduccion no se vuelve a anotar
+        self.reproducidos = self.reproducir(self.ruta_eventos(self.generacion), mundo)
+        self._limpiar_viejos()
+        self._vincular(mundo)
+        self._archivo = open(self.ruta_eventos(self.generacion), "ab")
+        self._sincronizar_directorio()
+        suscribir(self)
+        return mundo
+
+    @staticmethod
+    def reproducir(ruta: str, mundo: Mundo) -> int:
+        if not os.path.exists(ruta):
+            return 0
+        aldeas, ninjas, registro = mundo.aldeas, mundo.ninjas, mundo.registro
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        # lo que viene despues del ultimo salto es una escritura cortada por un corte
+        valido = datos.rfind(b"\n") + 1
+        try:
+            # todo el log como un solo arreglo json, mucho mas rapido que linea por linea
+            eventos = json.loads(b"[" + datos[:valido].rstrip(b"\n").replace(b"\n", b",") + b"]")
+        except json.JSONDecodeError:
+            # alguna linea rota en el medio: se reproduce hasta ella
+            lineas = datos[:valido].splitlines(keepends=True)
+            eventos = []
+            valido = 0
+            for linea in lineas:
+                try:
+                    eventos.append(json.loads(linea))
+                except json.JSONDecodeError:
+                    break
+                valido += len(linea)
+        for evento in eventos:
+            tipo = evento["t"]
+            if tipo == "e":
+                est = ninjas[evento["i"]].estadisticas
+                est.ataque, est.defensa, est.chakra = evento["s"]
+                est.version += 1
+            elif tipo == "n":
+                ninja = Ninja(evento["n"], RangoNinja(evento["r"]), Estadisticas(*evento["s"]))
+                ninja.jutsus.extend(Jutsu.compartido(*j) for j in evento["j"])
+                aldeas[evento["al"]].add_ninja(ninja)
+                registro.registrar_ninja(ninja)
+                ninjas.append(ninja)
+            elif tipo == "x":
+                ninja = ninjas[evento["i"]]
+                aldeas[evento["al"]].add_ninja(ninja)
+                registro.registrar_ninja(ninja)
+            elif tipo == "j":
+                ninjas[evento["i"]].jutsus.append(Jutsu.compartido(*evento["j"]))
+            elif tipo == "a":
+                aldeas.append(registro.registrar_aldea(Aldea(evento["n"])))
+            elif tipo == "m":
+                mundo.misiones.append(Mision(RangoMision(evento["r"]), evento["p"], RangoNinja(evento["q"])))
+        if valido < len(datos):
+            with open(ruta, "r+b") as f:
+                f.truncate(valido)
+        return len(eventos)
+
+    def _vincular(self, mundo: Mundo):
+        self.mundo = mundo
+        mundo.bitacora = self
+        self._indexar()
+        self._ninja_de = {n.estadisticas: n for n in mundo.ninjas}
+        self._aldea_de = {n: n.aldea for n in mundo.ninjas}
+
+    def _indexar(self):
+        # las posiciones son las que va a tener cada objeto al reproducir: las aldeas en el orden
+        # del snapshot (que agrega al final las que solo tienen algun ninja) y los ninjas de
+        # mundo.ninjas sin repetidos, igual que los escribe compactar()
+        ninjas = self._ninjas()
+        aldeas = _aldeas_snapshot(self.mundo.aldeas, ninjas)
+        self._indice_aldea = {a: i for i, a in enumerate(aldeas)}
+        self._indice_ninja = {n: i for i, n in enumerate(ninjas)}
+        self._aldeas_anotadas = len(aldeas)
+        self._ninjas_anotados = len(ninjas)
+
+    def _ninjas(self) -> list[Ninja]:
+        # un ninja agregado dos veces queda dos veces en mundo.ninjas pero es uno solo
+        return list(dict.fromkeys(self.mundo.ninjas))
+
+    def _limpiar_viejos(self):
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith(".tmp.snap"):
+                os.remove(os.path.join(self.directorio, nombre))
+        for generacion in self._generaciones("mundo-", ".snap"):
+            if generacion < self.generacion:
+                os.remove(self.ruta_snapshot(generacion))
+        for generacion in self._generaciones("eventos-", ".ndjson"):
+            if generacion < self.generacion:
+                os.remove(self.ruta_eventos(generacion))
+
+    def _sincronizar_directorio(self):
+        if self.fsync and hasattr(os, "O_DIRECTORY"):
+            fd = os.open(self.directorio, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    # escritura
+
+    def _anotar(self, linea: str):
+        self._pendientes.append(linea)
+        self.eventos += 1
+        if len(self._pendientes) >= self.lote or time.monotonic() - self._ultimo >= self.intervalo:
+            # aca solo se escribe: se esta en medio de un cambio del mundo (el objeto puede no
+            # estar todavia en mundo.ninjas), un snapshot ahora lo perderia
+            self._volcar()
+
+    def sincronizar(self):
+        # punto seguro entre operaciones (main lo llama antes de cada menu): vuelca lo pendiente
+        # y, si toca, compacta
+        self._volcar()
+        if self.compactar_cada is not None and self._desde_compactacion >= self.compactar_cada:
+            self.compactar()
+
+    def _volcar(self):
+        # un write y un fsync para todo el lote
+        if self._pendientes and self._archivo is not None:
+            self._archivo.write("".join(self._pendientes).encode("utf-8"))
+            self._archivo.flush()
+            if self.fsync:
+                os.fsync(self._archivo.fileno())
+            self._desde_compactacion += len(self._pendientes)
+            self._pendientes.clear()
+            self.sincronizaciones += 1
+        self._ultimo = time.monotonic()
+
+    def aldea_creada(self, aldea: Aldea):
+        if aldea in self._indice_aldea:
+            return
+        self._indice_aldea[aldea] = self._aldeas_anotadas
+        self._aldeas_anotadas += 1
+        self._anotar(json.dumps({"t": "a", "n": aldea.nombre}, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def ninja_creado(self, ninja: Ninja, aldea: Aldea):
+        al = self._indice_aldea.get(aldea)
+        if al is None or ninja in self._indice_ninja:
+            # un ninja que ya esta anotado no se crea de nuevo: si cambia de aldea va como "x"
+            return
+        self._indice_ninja[ninja] = self._ninjas_anotados
+        self._ninjas_anotados += 1
+        self._ninja_de[ninja.estadisticas] = ninja
+        self._aldea_de[ninja] = aldea
+        est = ninja.estadisticas
+        self._anotar(json.dumps({"t": "n", "n": ninja.nombre, "r": ninja.rango.value,
+                                 "s": [est.ataque, est.defensa, est.chakra],
+                                 "j": [[j.nombre, j.costo_chakra, j.efecto] for j in ninja.jutsus], "al": al},
+                                ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def mision_creada(self, mision: Mision):
+        self._anotar(f'{{"t":"m","r":"{mision.rango.value}","p":{mision.recompensa},'
+                     f'"q":"{mision.rango_requerido.value}"}}\n')
+
+    # avisos de los observadores; lo que no esta en el mundo no se anota
+
+    def entrenado(self, estadisticas: Estadisticas):
+        ninja = self._ninja_de.get(estadisticas)
+        if ninja is not None:
+            e = estadisticas
+            self._anotar(f'{{"t":"e","i":{self._indice_ninja[ninja]},"s":[{e.ataque},{e.defensa},{e.chakra}]}}\n')
+
+    def ninja_asignado(self, ninja: Ninja, aldea: Aldea):
+        i = self._indice_ninja.get(ninja)
+        if i is None or self._aldea_de.get(ninja) is aldea:
+            return
+        al = self._indice_aldea.get(aldea)
+        if al is not None:
+            self._aldea_de[ninja] = aldea
+            self._anotar(f'{{"t":"x","i":{i},"al":{al}}}\n')
+
+    def jutsu_agregado(self, ninja: Ninja, jutsu: Jutsu):
+        i = self._indice_ninja.get(ninja)
+        if i is not None:
+            self._anotar(json.dumps({"t": "j", "i": i, "j": [jutsu.nombre, jutsu.costo_chakra, jutsu.efecto]},
+                                    ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    # compactacion
+
+    def compactar(self) -> str:
+        if self.mundo is None:
+            raise ValueError("la bitacora no tiene un mundo abierto")
+        self._volcar()
+        siguiente = self.generacion + 1
+        ruta = self.ruta_snapshot(siguiente)
+        temporal = os.path.join(self.directorio, f"mundo-{siguiente}.tmp.snap")
+        guardar_snapshot(temporal, self.mundo.aldeas, self._ninjas(), self.mundo.misiones)
+        if self.fsync:
+            with open(temporal, "rb") as f:
+                os.fsync(f.fileno())
+        # el rename es el punto de no retorno: si hay un corte antes, se recupera la generacion vieja
+        os.replace(temporal, ruta)
+        # el log nuevo arranca desde las posiciones de este snapshot
+        self._indexar()
+        self._archivo.close()
+        self.generacion = siguiente
+        self._archivo = open(self.ruta_eventos(siguiente), "ab")
+        self._sincronizar_directorio()
+        self._limpiar_viejos()
+        self._desde_compactacion = 0
+        return ruta
+
+    def adoptar(self, mundo: Mundo) -> str:
+        # el mundo se reemplazo entero (snapshot o importacion): se compacta como generacion nueva
+        self._volcar()
+        if self.mundo is not None:
+            self.mundo.bitacora = None
+        self._vincular(mundo)
+        return self.compactar()
+
+    def cerrar(self):
+        desuscribir(self)
+        if self._archivo is not None:
+            self._volcar()
+            self._archivo.close()
+            self._archivo = None
+        if self.mundo is not None:
+            self.mundo.bitacora = None
+
+
+# importacion: el camino inverso de los visitors. todo se lee de forma incremental
+# (bloques de json, iterparse, openpyxl en solo lectura) para no cargar el archivo entero
+
+class ResultadoImportacion:
+    def __init__(self, mundo: Mundo, ruta: str, registros: int, segundos: float):
+        self.mundo = mundo
+        self.ruta = ruta
+        self.registros = registros
+        self.segundos = segundos
+
+    @property
+    def por_segundo(self) -> float:
+        return self.registros / self.segundos if self.segundos else 0.0
+
+    def __str__(self):
+        return (f"Datos importados de {self.ruta}: {len(self.mundo.aldeas)} aldeas, {len(self.mundo.ninjas)} ninjas, "
+                f"{len(self.mundo.misiones)} misiones ({self.por_segundo:,.0f} registros/s)")
+
+
+class _Reconstructor:
+    # arma el mundo reutilizando aldeas por nombre y jutsus por (nombre, costo, efecto)
+    def __init__(self):
+        self.mundo = Mundo()
+        self.registros = 0
+        self._aldeas: dict[str, Aldea] = {}
+        self._inicio = time.perf_counter()
+
+    def aldea(self, nombre: str | None) -> Aldea | None:
+        if not nombre:
+            return None
+        aldea = self._aldeas.get(nombre)
+        if aldea is None:
+            aldea = self._aldeas[nombre] = self.mundo.registro.registrar_aldea(Aldea(nombre))
+            self.mundo.aldeas.append(aldea)
+        return aldea
+
+    def ninja(self, nombre: str, rango: str, ataque: int, defensa: int, chakra: int,
+              aldea: str | None, jutsus: Iterable[Jutsu]) -> Ninja:
+        builder = (NinjaBuilder()
+                   .with_nombre(nombre)
+                   .with_rango(RangoNinja(rango))
+                   .with_estadisticas(Estadisticas(int(ataque), int(defensa), int(chakra))))
+        for j in jutsus:
+            builder.with_jutsu(j)
+        ninja = builder.build()
+        destino = self.aldea(aldea)
+        if destino is not None:
+            destino.add_ninja(ninja)
+        self.mundo.registro.registrar_ninja(ninja)
+        self.mundo.ninjas.append(ninja)
+        self.registros += 1
+        return ninja
+
+    def mision(self, rango: str, recompensa: int, rango_requerido: str) -> Mision:
+        mision = Mision(RangoMision(rango), int(recompensa), RangoNinja(rango_requerido))
+        self.mundo.misiones.append(mision)
+        self.registros += 1
+        return mision
+
+    def registro_json(self, tipo: str, registro: dict):
+        if tipo == "ninja":
+            est = registro["estadisticas"]
+            jutsus = [Jutsu.compartido(j["nombre"], j["costo_chakra"], j["efecto"]) for j in registro["jutsus"]]
+            self.ninja(registro["nombre"], registro["rango"], est["ataque"], est["defensa"], est["chakra"],
+                       registro["aldea"], jutsus)
+        elif tipo == "mision":
+            self.mision(registro["rango"], registro["recompensa"], registro["rangoRequerido"])
+        else:
+            raise ValueError(f"tipo de registro desconocido: {tipo}")
+
+    def resultado(self, ruta: str) -> ResultadoImportacion:
+        return ResultadoImportacion(self.mundo, ruta, self.registros, time.perf_counter() - self._inicio)
+
+
+class _LectorJson:
+    # recorre {"ninjas": [...], "misiones": [...]} de a bloques, decodificando un registro por vez
+    def __init__(self, f, tam_bloque: int = 1 << 16):
+        self.f = f
+        self.tam_bloque = tam_bloque
+        self.buf = ""
+        self.pos = 0
+        self.offset = 0  # caracteres ya descartados antes de buf, para los mensajes de error
+        self.mayor = 0  # largo del registro valido mas largo visto
+        self.decoder = json.JSONDecoder()
+
+    def _llenar(self) -> bool:
+        bloque = self.f.read(self.tam_bloque)
+        if not bloque:
+            return False
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + bloque
+        self.pos = 0
+        return True
+
+    def _caracter(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._llenar():
+                return self.buf[self.pos] if self.pos < len(self.buf) else ""
+
+    def _esperar(self, esperado: str):
+        c = self._caracter()
+        if c != esperado:
+            raise ValueError(f"JSON inesperado: se esperaba {esperado!r} y llego {c!r}")
+        self.pos += 1
+
+    def _valor(self):
+        self._caracter()
+        while True:
+            try:
+                valor, fin = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # si el error esta lejos del final del buffer no es un registro cortado por el bloque:
+                # el archivo esta roto y se corta ahi. si puede ser un corte se leen mas bloques, pero
+                # con un tope, si no un archivo roto iria entero a memoria
+                cortado = e.pos >= len(self.buf) - 64 or e.msg.startswith("Unterminated string")
+                if (not cortado or len(self.buf) - self.pos > 4 * self.mayor + 64 * self.tam_bloque
+                        or not self._llenar()):
+                    raise ValueError(f"JSON mal formado cerca del caracter {self.offset + e.pos}: {e.msg}")
+                continue
+            self.mayor = max(self.mayor, fin - self.pos)
+            self.pos = fin
+            return valor
+
+    def registros(self):
+        self._esperar("{")
+        if self._caracter() == "}":
+            return
+        while True:
+            seccion = self._valor()
+            tipo = {"ninjas": "ninja", "misiones": "mision"}.get(seccion, seccion)
+            self._esperar(":")
+            self._esperar("[")
+            if self._caracter() == "]":
+                self.pos += 1
+            else:
+                while True:
+                    yield tipo, self._valor()
+                    c = self._caracter()
+                    self.pos += 1
+                    if c == "]":
+                        break
+                    if c != ",":
+                        raise ValueError(f"JSON inesperado: {c!r} dentro de {seccion}")
+            c = self._caracter()
+            self.pos += 1
+            if c == "}":
+                return
+            if c != ",":
+                raise ValueError(f"JSON inesperado: {c!r} despues de {seccion}")
+
+
+def importar_json(filename: str) -> ResultadoImportacion:
+    reconstructor = _Reconstructor()
+    with open(filename, encoding="utf-8") as f:
+        for tipo, registro in _LectorJson(f).registros():
+            reconstructor.registro_json(tipo, registro)
+    return reconstructor.resultado(os.path.abspath(filename))
+
+
+def importar_ndjson(filename: str) -> ResultadoImportacion:
+    reconstructor = _Reconstructor()
+    with open(filename, encoding="utf-8") as f:
+        for linea in f:
+            if linea.strip():
+                registro = json.loads(linea)
+                reconstructor.registro_json(registro.pop("tipo"), registro)
+    return reconstructor.resultado(os.path.abspath(filename))
+
+
+def importar_xml(filename: str) -> ResultadoImportacion:
+    reconstructor = _Reconstructor()
+    contenedor = None
+    try:
+        for evento, elem in ET.iterparse(filename, events=("start", "end")):
+            if evento == "start":
+                if elem.tag in ("ninjas", "misiones"):
+                    contenedor = elem
+                continue
+            if elem.tag not in ("ninja", "mision"):
+                continue
+            if contenedor is None:
+                # ninja o mision fuera de <ninjas>/<misiones>: no es un archivo de exportar_xml
+                raise ValueError("formato xml no reconocido")
+            if elem.tag == "ninja":
+                est = elem.find("estadisticas")
+                if est is None:
+                    raise ValueError("formato xml no reconocido: ninja sin estadisticas")
+                jutsus = [Jutsu.compartido(j.findtext("nombre", ""), int(j.findtext("costo", "0")),
+                                           j.findtext("efecto", "")) for j in elem.iterfind("jutsus/jutsu")]
+                reconstructor.ninja(elem.findtext("nombre", ""), elem.findtext("rango"), est.findtext("ataque"),
+                                    est.findtext("defensa"), est.findtext("chakra"), elem.findtext("aldea"), jutsus)
+            else:
+                reconstructor.mision(elem.findtext("rango"), elem.findtext("recompensa"),
+                                     elem.findtext("rangoRequerido"))
+            # lo ya procesado se suelta del arbol para que la memoria no crezca
+            contenedor.clear()
+    except ET.ParseError as e:
+        raise ValueError(f"xml mal formado: {e}")
+    return reconstructor.resultado(os.path.abspath(filename))
+
+
+def importar_excel(filename: str) -> ResultadoImportacion:
+    # el excel solo guarda los nombres de los jutsus: se reutiliza el jutsu compartido con ese
+    # nombre si existe (los de las fabricas), si no se crea uno sin costo ni efecto
+    por_nombre = {j.nombre: j for j in Jutsu._compartidos.values()}
+
+    def jutsu(nombre: str) -> Jutsu:
+        if nombre not in por_nombre:
+            por_nombre[nombre] = Jutsu.compartido(nombre, 0, "")
+        return por_nombre[nombre]
+
+    try:
+        import openpyxl
+    except ImportError:
+        raise ValueError("importar excel necesita openpyxl instalado")
+    reconstructor = _Reconstructor()
+    libro = openpyxl.load_workbook(filename, read_only=True)
+    try:
+        for hoja in libro.worksheets:
+            filas = hoja.iter_rows(values_only=True)
+            encabezados = next(filas, None)
+            if encabezados is None:
+                continue
+            col = {nombre: i for i, nombre in enumerate(encabezados)}
+            if hoja.title.startswith("Ninjas"):
+                for fila in filas:
+                    if fila[col["Nombre"]] is None:
+                        continue
+                    nombres_jutsus = fila[col["Jutsus"]]
+                    jutsus = [jutsu(n) for n in _separar_jutsus(nombres_jutsus)] if nombres_jutsus else []
+                    reconstructor.ninja(str(fila[col["Nombre"]]), fila[col["Rango"]], fila[col["Ataque"]],
+                                        fila[col["Defensa"]], fila[col["Chakra"]], fila[col["Aldea"]], jutsus)
+            elif hoja.title.startswith("Misiones"):
+                for fila in filas:
+                    if fila[col["Rango"]] is None:
+                        continue
+                    reconstructor.mision(fila[col["Rango"]], fila[col["Recompensa"]], fila[col["Rango Requerido"]])
+    finally:
+        libro.close()
+    return reconstructor.resultado(os.path.abspath(filename))
+
+
+IMPORTADORES = {
+    ".json": importar_json,
+    ".ndjson": importar_ndjson,
+    ".xml": importar_xml,
+    ".xlsx": importar_excel,
+}
+
+
+def importar(filename: str) -> ResultadoImportacion:
+    importador = IMPORTADORES.get(os.path.splitext(filename)[1].lower())
+    if importador is None:
+        raise ValueError(f"formato no soportado: {filename}")
+    return importador(filename)
+
+
 
 
 def seleccionar_indice(opciones: list[str], prompt: str) -> int:
@@ -394,40 +3594,40 @@ def seleccionar_indice(opciones: list[str], prompt: str) -> int:
 
 
 def main():
-    ninjas: list[Ninja] = []
-    misiones: list[Mision] = []
-    aldeas: list[Aldea] = []
-
-    factories = {
-        "hoja": HojaFactory(),
-        "arena": ArenaFactory(),
-        "niebla": NieblaFactory(),
-        "roca": RocaFactory(),
-        "nube": NubeFactory(),
-        "sonido": SonidoFactory(),
-        "lluvia": LluviaFactory(),
-    }
+    # el mundo se recupera del ultimo snapshot mas el log de eventos de la carpeta de datos
+    bitacora = Bitacora(os.environ.get("NARUTO_DATOS", "naruto_datos"))
+    mundo = bitacora.recuperar()
+    if mundo.aldeas or mundo.misiones:
+        print(f"mundo recuperado: {len(mundo.aldeas)} aldeas, {len(mundo.ninjas)} ninjas, "
+              f"{len(mundo.misiones)} misiones ({bitacora.reproducidos} eventos reproducidos).")
+    suscribir(mundo.registro)
+    analitica = Analitica(mundo.aldeas)
+    suscribir(analitica)
 
     while True:
+        # lo de la opcion anterior queda en disco antes de volver al menu
+        bitacora.sincronizar()
         print("\n=== MENÚ PRINCIPAL ===")
         print("1. crear aldea")
         print("2. crear ninja (builder o factory) y asignar a aldea")
         print("3. crear misión")
         print("4. entrenar ninja")
         print("5. pelear entre dos ninjas")
-        print("6. exportar datos (Texto / JSON / XML / Excel)")
+        print("6. exportar datos (Texto / JSON / NDJSON / XML / Excel / todos)")
         print("7. listar aldeas y ninjas")
+        print("8. guardar / cargar snapshot binario")
+        print("9. importar datos (JSON / NDJSON / XML / Excel)")
         print("0. Salir")
 
         opcion = input("elige una opción: ").strip()
 
         if opcion == "1":
             nombre = input("nombre de la aldea: ").strip()
-            aldeas.append(Aldea(nombre))
+            mundo.crear_aldea(nombre)
             print(f"aldea {nombre} creada.")
 
         elif opcion == "2":
-            if not aldeas:
+            if not mundo.aldeas:
                 print("no hay aldeas. Crea una primero (opción 1).")
                 continue
 
@@ -455,7 +3655,7 @@ def main():
                         jn = input("nombre del jutsu: ").strip()
                         jc = int(input("costo de chakra: ").strip())
                         je = input("efecto: ").strip()
-                        ninja.jutsus.append(Jutsu(jn, jc, je))
+                        ninja.add_jutsu(Jutsu(jn, jc, je))
                     else:
                         break
 
@@ -463,7 +3663,7 @@ def main():
                 nombre = input("nombre del ninja: ").strip()
                 print("aldea de origen (hoja, arena, niebla, roca, nube, sonido, lluvia)")
                 aldea_origen = input("aldea: ").strip().lower()
-                factory = factories.get(aldea_origen)
+                factory = FABRICAS.get(aldea_origen)
                 if not factory:
                     print("aldea no válida. Se creará un Genin básico por defecto.")
                     ninja = Ninja(nombre, RangoNinja.GENIN, Estadisticas(40, 40, 80))
@@ -475,42 +3675,40 @@ def main():
 
             while True:
                 aldea_asignar_nombre = input("elige la aldea a asignar por nombre: ").strip().lower()
-                aldea_encontrada = next((a for a in aldeas if a.nombre.lower() == aldea_asignar_nombre), None)
-                if aldea_encontrada:
-                    aldea_encontrada.add_ninja(ninja)
-                    ninjas.append(ninja)
-                    print(f"ninja {ninja.nombre} creado y asignado a {aldea_encontrada.nombre}.")
-                    break
-                else:
+                try:
+                    mundo.agregar_ninja(ninja, aldea_asignar_nombre)
+                except ValueError:
                     print("aldea no encontrada. hazlo otra vez.")
+                    continue
+                print(f"ninja {ninja.nombre} creado y asignado a {ninja.aldea.nombre}.")
+                break
 
         elif opcion == "3":
             rango = RangoMision[input("rango de la misión (D,C,B,A,S): ").strip().upper()]
             recompensa = int(input("recompensa: ").strip())
             rango_req = RangoNinja[input("rango requerido (Genin,Chunin,Jonin,Kage,Sannin): ").strip().upper()]
-            mision = Mision(rango, recompensa, rango_req)
-            misiones.append(mision)
+            mundo.crear_mision(rango, recompensa, rango_req)
             print(f"misión de rango {rango.value} creada.")
 
         elif opcion == "4":
-            if not ninjas:
+            if not mundo.ninjas:
                 print("no hay ninjas creados.")
                 continue
             
             # Nuevo: Ahora permite buscar por nombre
             while True:
                 print("ninjas disponibles para entrenar:")
-                for n in ninjas:
+                for n in mundo.ninjas:
                     print(f"- {n.nombre} ({n.rango.value})")
 
                 ninja_entrenar_nombre = input("elige el ninja a entrenar por nombre: ").strip().lower()
-                ninja_encontrado = next((n for n in ninjas if n.nombre.lower() == ninja_entrenar_nombre), None)
+                ninja_encontrado = mundo.registro.buscar_ninja(ninja_entrenar_nombre)
                 
                 if ninja_encontrado:
                     inc_atq = int(input("incremento de ataque: ").strip() or "0")
                     inc_def = int(input("incremento de defensa: ").strip() or "0")
                     inc_chk = int(input("incremento de chakra: ").strip() or "0")
-                    ninja_encontrado.entrenar(inc_atq, inc_def, inc_chk)
+                    ninja_encontrado.entrenar(inc_ataque=inc_atq, inc_defensa=inc_def, inc_chakra=inc_chk)
                     est = ninja_encontrado.estadisticas
                     print(f"{ninja_encontrado.nombre} entrenó: Ataque={est.ataque}, Defensa={est.defensa}, Chakra={est.chakra}")
                     break
@@ -518,21 +3716,21 @@ def main():
                     print("ninja no encontrado. repite nuevamente.")
 
         elif opcion == "5":
-            if len(ninjas) < 2:
+            if len(mundo.ninjas) < 2:
                 print("necesitas al menos 2 ninjas.")
                 continue
 
             # Nuevo: Ahora permite buscar por nombre
             while True:
                 print("Elige los dos ninjas para el combate por nombre:")
-                for n in ninjas:
+                for n in mundo.ninjas:
                     print(f"- {n.nombre} ({n.rango.value})")
                 
                 ninja1_nombre = input("ninja 1: ").strip().lower()
                 ninja2_nombre = input("ninja 2: ").strip().lower()
 
-                ninja1 = next((n for n in ninjas if n.nombre.lower() == ninja1_nombre), None)
-                ninja2 = next((n for n in ninjas if n.nombre.lower() == ninja2_nombre), None)
+                ninja1 = mundo.registro.buscar_ninja(ninja1_nombre)
+                ninja2 = mundo.registro.buscar_ninja(ninja2_nombre)
 
                 if not ninja1 or not ninja2:
                     print("uno o ambos ninjas no fueron encontrados. repite el preceso.")
@@ -545,40 +3743,103 @@ def main():
                 break
 
         elif opcion == "6":
-            if not ninjas and not misiones:
+            if not mundo.ninjas and not mundo.misiones:
                 print("No hay datos para exportar.")
                 continue
 
-            print("Formatos disponibles: texto, json, xml, excel")
+            print("Formatos disponibles: texto, json, ndjson, xml, excel, todos")
             fmt = input("Elige formato: ").strip().lower()
 
             if fmt == "texto":
                 nombre = input("archivo de salida (vacío para mostrar en pantalla): ").strip()
-                mensaje = exportar_texto(ninjas, misiones, filename=nombre if nombre else None)
+                mensaje = exportar_texto(mundo.ninjas, mundo.misiones, filename=nombre if nombre else None)
                 print(mensaje)
             elif fmt == "json":
                 nombre = input("archivo de salida (vacío para mostrar en pantalla): ").strip()
-                resultado = exportar_json(ninjas, misiones, filename=nombre if nombre else None)
+                resultado = exportar_json(mundo.ninjas, mundo.misiones, filename=nombre if nombre else None)
                 print(resultado if nombre else resultado)
+            elif fmt == "ndjson":
+                nombre = input("archivo de salida (vacío para mostrar en pantalla): ").strip()
+                print(exportar_ndjson(mundo.ninjas, mundo.misiones, filename=nombre if nombre else None))
             elif fmt == "xml":
                 nombre = input("archivo de salida (vacío para mostrar en pantalla): ").strip()
-                resultado = exportar_xml(ninjas, misiones, filename=nombre if nombre else None)
+                resultado = exportar_xml(mundo.ninjas, mundo.misiones, filename=nombre if nombre else None)
                 print(resultado if nombre else resultado)
             elif fmt == "excel":
                 nombre = input("archivo .xlsx (por defecto export.xlsx): ").strip() or "export.xlsx"
-                print(exportar_excel(ninjas, misiones, filename=nombre))
+                print(exportar_excel(mundo.ninjas, mundo.misiones, filename=nombre, analitica=analitica))
+            elif fmt == "todos":
+                nombre = input("nombre base de los archivos (por defecto export): ").strip() or "export"
+                print(exportar_todo(mundo.ninjas, mundo.misiones, base=nombre))
             else:
                 print("formato no reconocido.")
 
         elif opcion == "7":
-            if not aldeas:
+            if not mundo.aldeas:
                 print("no hay aldeas.")
                 continue
-            for a in aldeas:
+            for a in mundo.aldeas:
                 print(f"- {a.nombre}: {[n.nombre for n in a.ninjas] or 'Sin ninjas'}")
+                if analitica.total(a):
+                    p = analitica.promedios(a)
+                    rangos = ", ".join(f"{r.value}: {c}" for r, c in analitica.conteo_rangos(a).items() if c)
+                    print(f"    promedios -> Ataque: {p['ataque']:.1f}, Defensa: {p['defensa']:.1f}, "
+                          f"Chakra: {p['chakra']:.1f} | {rangos}")
+            for campo in Analitica.CAMPOS:
+                top = analitica.top(campo, 3)
+                if top:
+                    print(f"top {campo}: " + ", ".join(f"{n.nombre} ({getattr(n.estadisticas, campo)})" for n in top))
+
+        elif opcion == "8":
+            accion = input("(g)uardar, (c)argar o compactar la (b)itácora: ").strip().lower()
+            if accion == "b":
+                print(f"bitácora compactada en {bitacora.compactar()}")
+                continue
+            ruta = input("archivo .snap (por defecto mundo.snap): ").strip() or "mundo.snap"
+            if accion == "g":
+                print(mundo.guardar_snapshot(ruta))
+            elif accion == "c":
+                # la analitica vieja no tiene que ver los ninjas del mundo que se esta armando
+                desuscribir(analitica)
+                try:
+                    cargado = Mundo.cargar_snapshot(ruta)
+                except (OSError, ValueError) as e:
+                    suscribir(analitica)
+                    print(f"no se pudo cargar el snapshot: {e}")
+                    continue
+                desuscribir(mundo.registro)
+                mundo = cargado
+                bitacora.adoptar(mundo)
+                analitica = Analitica(mundo.aldeas)
+                suscribir(mundo.registro)
+                suscribir(analitica)
+                print(f"mundo cargado: {len(mundo.aldeas)} aldeas, {len(mundo.ninjas)} ninjas, "
+                      f"{len(mundo.misiones)} misiones.")
+            else:
+                print("opción no válida.")
+
+        elif opcion == "9":
+            ruta = input("archivo a importar (.json, .ndjson, .xml, .xlsx): ").strip()
+            desuscribir(analitica)
+            try:
+                resultado = importar(ruta)
+            except (OSError, ValueError, KeyError) as e:
+                suscribir(analitica)
+                print(f"no se pudo importar: {e}")
+                continue
+            desuscribir(mundo.registro)
+            mundo = resultado.mundo
+            bitacora.adoptar(mundo)
+            analitica = Analitica(mundo.aldeas)
+            suscribir(mundo.registro)
+            suscribir(analitica)
+            print(resultado)
 
         elif opcion == "0":
             print("chao pescao...")
+            desuscribir(mundo.registro)
+            desuscribir(analitica)
+            bitacora.cerrar()
             break
 
         else:
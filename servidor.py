@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import naruto as nr
+
+
+# servidor multiusuario: protocolo de lineas json sobre tcp. cada pedido es
+#   {"op": "entrenar", "nombre": "naruto", "ataque": 5}
+# y cada respuesta {"ok": true, "resultado": ...} o {"ok": false, "error": "..."}.
+# todas las operaciones pasan por un unico actor que es el unico que toca el mundo,
+# asi no hay carreras; las exportaciones se renderizan en un executor fuera del loop
+# y los archivos solo se escriben dentro de la carpeta de salida
+#   python servidor.py --puerto 8765 --salida exportaciones
+
+FORMATOS_SERVIDOR = ("texto", "json", "ndjson", "xml", "excel", "todos")
+
+
+class ErrorPedido(Exception):
+    pass
+
+
+def _campo(pedido: dict, nombre: str, tipo=str, defecto=None):
+    valor = pedido.get(nombre, defecto)
+    if valor is None:
+        raise ErrorPedido(f"falta el campo {nombre!r}")
+    try:
+        return tipo(valor)
+    except (TypeError, ValueError):
+        raise ErrorPedido(f"campo {nombre!r} inválido: {valor!r}")
+
+
+def _enum(enum, pedido: dict, nombre: str, defecto=None):
+    valor = _campo(pedido, nombre, defecto=defecto)
+    try:
+        return enum[valor.strip().upper()]
+    except KeyError:
+        raise ErrorPedido(f"{nombre} inválido: {valor}")
+
+
+def _ruta_salida(directorio: str, archivo) -> str:
+    # el nombre lo manda el cliente: nada de rutas absolutas ni de salir de la carpeta con ..
+    archivo = str(archivo).strip()
+    if not archivo or os.path.isabs(archivo) or ".." in archivo.replace("\\", "/").split("/"):
+        raise ErrorPedido(f"archivo inválido: {archivo!r}, debe ser una ruta relativa a la carpeta de salida")
+    base = os.path.realpath(directorio)
+    ruta = os.path.realpath(os.path.join(base, archivo))
+    if not ruta.startswith(base + os.sep):
+        raise ErrorPedido(f"archivo inválido: {archivo!r}, debe ser una ruta relativa a la carpeta de salida")
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    return ruta
+
+
+def _ninja_json(ninja: nr.Ninja) -> dict:
+    est = ninja.estadisticas
+    return {"nombre": ninja.nombre, "rango": ninja.rango.value, "aldea": ninja.aldea.nombre if ninja.aldea else None,
+            "ataque": est.ataque, "defensa": est.defensa, "chakra": est.chakra}
+
+
+def _exportar(formato: str, ninjas: list, misiones: list, archivo: str | None) -> str:
+    # corre en el executor sobre copias, el actor sigue atendiendo mientras tanto
+    if formato == "texto":
+        return nr.exportar_texto(ninjas, misiones, filename=archivo)
+    if formato == "json":
+        return nr.exportar_json(ninjas, misiones, filename=archivo)
+    if formato == "ndjson":
+        return nr.exportar_ndjson(ninjas, misiones, filename=archivo)
+    if formato == "xml":
+        return nr.exportar_xml(ninjas, misiones, filename=archivo)
+    if formato == "excel":
+        return nr.exportar_excel(ninjas, misiones, filename=archivo or "export.xlsx")
+    return nr.exportar_todo(ninjas, misiones, base=archivo or "export")
+
+
+class ActorMundo:
+    # escritor unico: los pedidos entran a una cola y una sola tarea los aplica en orden
+    def __init__(self, mundo: nr.Mundo | None = None, executor: ThreadPoolExecutor | None = None,
+                 salida: str = "exportaciones"):
+        self.mundo = mundo or nr.Mundo()
+        self.salida = salida
+        self.executor = executor or ThreadPoolExecutor(max_workers=2)
+        self._cola: asyncio.Queue = asyncio.Queue()
+        self._tarea: asyncio.Task | None = None
+        self.atendidos = 0
+        self.operaciones = {
+            "crear_aldea": self._crear_aldea,
+            "crear_ninja": self._crear_ninja,
+            "crear_mision": self._crear_mision,
+            "entrenar": self._entrenar,
+            "pelear": self._pelear,
+            "listar": self._listar,
+            "exportar": self._exportar,
+        }
+
+    def iniciar(self):
+        nr.suscribir(self.mundo.registro)
+        self._tarea = asyncio.get_running_loop().create_task(self._atender())
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        nr.desuscribir(self.mundo.registro)
+        self.executor.shutdown(wait=False)
+
+    async def pedir(self, pedido: dict):
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((pedido, futuro))
+        return await futuro
+
+    async def _atender(self):
+        while True:
+            pedido, futuro = await self._cola.get()
+            try:
+                operacion = self.operaciones.get(pedido.get("op"))
+                if operacion is None:
+                    raise ErrorPedido(f"operación desconocida: {pedido.get('op')}")
+                resultado = operacion(pedido)
+                if isinstance(resultado, asyncio.Future):
+                    # exportacion: ya tiene su copia, la respuesta llega cuando termine el executor
+                    resultado.add_done_callback(lambda r, f=futuro: _resolver(f, r))
+                elif not futuro.cancelled():
+                    futuro.set_result(resultado)
+            except Exception as e:
+                # cualquier error de un pedido va a ese cliente, el actor no se puede caer
+                if not futuro.cancelled():
+                    futuro.set_exception(ErrorPedido(str(e)))
+            self.atendidos += 1
+
+    def _crear_aldea(self, pedido: dict):
+        return self.mundo.crear_aldea(_campo(pedido, "nombre")).nombre
+
+    def _crear_ninja(self, pedido: dict):
+        try:
+            jutsus = [nr.Jutsu(str(n), int(c), str(e)) for n, c, e in pedido.get("jutsus", ())]
+        except (TypeError, ValueError):
+            raise ErrorPedido("jutsus debe ser una lista de [nombre, costo_chakra, efecto]")
+        origen = pedido.get("origen")
+        if origen is not None:
+            ninja = self.mundo.crear_ninja(_campo(pedido, "nombre"), _campo(pedido, "aldea"), origen=origen,
+                                           jutsus=jutsus)
+        else:
+            estadisticas = nr.Estadisticas(_campo(pedido, "ataque", int, 10), _campo(pedido, "defensa", int, 10),
+                                           _campo(pedido, "chakra", int, 50))
+            ninja = self.mundo.crear_ninja(_campo(pedido, "nombre"), _campo(pedido, "aldea"),
+                                           rango=_enum(nr.RangoNinja, pedido, "rango", "genin"),
+                                           estadisticas=estadisticas, jutsus=jutsus)
+        return _ninja_json(ninja)
+
+    def _crear_mision(self, pedido: dict):
+        mision = self.mundo.crear_mision(_enum(nr.RangoMision, pedido, "rango"), _campo(pedido, "recompensa", int),
+                                         _enum(nr.RangoNinja, pedido, "rango_requerido"))
+        return {"rango": mision.rango.value, "recompensa": mision.recompensa,
+                "rango_requerido": mision.rango_requerido.value}
+
+    def _entrenar(self, pedido: dict):
+        ninja = self.mundo.entrenar(_campo(pedido, "nombre"), inc_ataque=_campo(pedido, "ataque", int, 0),
+                                    inc_defensa=_campo(pedido, "defensa", int, 0),
+                                    inc_chakra=_campo(pedido, "chakra", int, 0))
+        return _ninja_json(ninja)
+
+    def _pelear(self, pedido: dict):
+        return self.mundo.pelear(_campo(pedido, "ninja1"), _campo(pedido, "ninja2"))
+
+    def _listar(self, pedido: dict):
+        return {a.nombre: [n.nombre for n in a.ninjas] for a in self.mundo.aldeas}
+
+    def _exportar(self, pedido: dict):
+        formato = _campo(pedido, "formato").lower()
+        if formato not in FORMATOS_SERVIDOR:
+            raise ErrorPedido(f"formato no reconocido: {formato}")
+        archivo = pedido.get("archivo")
+        if archivo is None and formato in ("excel", "todos"):
+            # estos siempre van a disco
+            archivo = "export"
+        if archivo is not None:
+            archivo = _ruta_salida(self.salida, archivo)
+        # copia consistente tomada dentro del actor; despues nadie la modifica
+        ninjas = nr._desacoplar(self.mundo.ninjas, {})
+        misiones = list(self.mundo.misiones)
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, _exportar, formato, ninjas, misiones, archivo)
+
+
+def _resolver(futuro: asyncio.Future, resultado: asyncio.Future):
+    if futuro.cancelled():
+        return
+    error = resultado.exception()
+    if error is not None:
+        futuro.set_exception(ErrorPedido(f"exportación fallida: {error}"))
+    else:
+        futuro.set_result(resultado.result())
+
+
+async def _leer_linea(reader: asyncio.StreamReader) -> bytes | None:
+    # como readline, pero una linea que pasa el limite se descarta entera hasta su salto
+    # y devuelve None, asi el resto no se lee como si fuera otro pedido
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        consumido = e.consumed
+    while True:
+        await reader.readexactly(consumido)
+        try:
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.LimitOverrunError as e:
+            consumido = e.consumed
+
+
+class Servidor:
+    def __init__(self, actor: ActorMundo, host: str = "127.0.0.1", puerto: int = 8765):
+        self.actor = actor
+        self.host = host
+        self.puerto = puerto
+        self._server: asyncio.Server | None = None
+        self.conexiones = 0
+
+    async def iniciar(self):
+        self.actor.iniciar()
+        self._server = await asyncio.start_server(self._cliente, self.host, self.puerto, limit=1 << 20, backlog=4096)
+        self.puerto = self._server.sockets[0].getsockname()[1]
+
+    async def detener(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.actor.detener()
+
+    async def _cliente(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.conexiones += 1
+        try:
+            while True:
+                linea = await _leer_linea(reader)
+                if linea == b"":
+                    break
+                try:
+                    if linea is None:
+                        raise ErrorPedido("pedido demasiado largo")
+                    pedido = json.loads(linea)
+                    if not isinstance(pedido, dict):
+                        raise ErrorPedido("el pedido debe ser un objeto json")
+                    respuesta = {"ok": True, "resultado": await self.actor.pedir(pedido)}
+                except (ErrorPedido, ValueError) as e:
+                    # ValueError cubre json invalido y bytes que no son utf-8
+                    respuesta = {"ok": False, "error": str(e)}
+                writer.write(json.dumps(respuesta, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.conexiones -= 1
+            writer.close()
+
+
+async def servir(host: str, puerto: int, salida: str = "exportaciones"):
+    servidor = Servidor(ActorMundo(salida=salida), host, puerto)
+    await servidor.iniciar()
+    print(f"servidor escuchando en {servidor.host}:{servidor.puerto}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servidor.detener()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="servidor multiusuario del mundo ninja")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--salida", default="exportaciones", help="carpeta donde se escriben las exportaciones")
+    args = parser.parse_args()
+    try:
+        asyncio.run(servir(args.host, args.puerto, args.salida))
+    except KeyboardInterrupt:
+        print("chao pescao...")
+
+
+if __name__ == "__main__":
+    main()